@@ -0,0 +1,2 @@
+"""Shared data layer for the cybersecurity threat dashboards."""
+from cyberdash.generator import generate_incidents
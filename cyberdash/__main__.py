@@ -0,0 +1,185 @@
+"""Command line helpers: ``python -m cyberdash <command>``."""
+import argparse
+import os
+import sys
+
+from cyberdash import bench, profiler, tracing
+from cyberdash.config import DATA_FORMAT, DATA_SOURCE, IMPORT_BUDGET_MS
+from cyberdash.generator import YEARS, generate_incidents
+from cyberdash.importtime import ROOT, app_pages, import_report
+from cyberdash.ingest import load_incidents, write_incidents
+from cyberdash.schema import memory_report
+from cyberdash.store import materialize
+from cyberdash.warmup import start_warm_up
+
+
+def cmd_memory(args):
+    report = memory_report(generate_incidents(args.rows))
+    print(f"rows:   {report['rows']:,}")
+    print(f"before: {report['before_bytes'] / 2**20:,.1f} MiB ({report['bytes_per_row_before']:.0f} B/row)")
+    print(f"after:  {report['after_bytes'] / 2**20:,.1f} MiB ({report['bytes_per_row_after']:.0f} B/row)")
+    print(f"ratio:  {report['ratio']:.1f}x")
+
+
+def cmd_generate(args):
+    df = generate_incidents(args.rows, seed=args.seed)
+    write_incidents(df, args.out, format=args.format, partition_by_year=not args.no_partition)
+    print(f"wrote {len(df):,} rows to {args.out}")
+
+
+def cmd_store(args):
+    df = load_incidents(DATA_SOURCE, format=DATA_FORMAT) if DATA_SOURCE else generate_incidents(args.rows, seed=args.seed)
+    materialize(df, args.path)
+    print(f"stored {len(df):,} rows in {args.path}")
+
+
+def cmd_imports(args):
+    over = 0
+    for page, (total, modules) in import_report(args.pages, repeat=args.repeat).items():
+        heaviest = sorted(modules.items(), key=lambda item: -item[1])[:3]
+        flag = 'OVER' if total > args.budget_ms else 'ok'
+        over += total > args.budget_ms
+        print(f"{total:8.1f} ms  {flag:4}  {os.path.relpath(page, ROOT)}  ({', '.join(f'{m} {ms:.0f} ms' for m, ms in heaviest)})")
+    print(f"budget: {args.budget_ms} ms per page, {over} over")
+    return 1 if over else 0
+
+
+def cmd_bench(args):
+    report = bench.run(args.rows, repeat=args.repeat, export=not args.no_export, workers=args.workers,
+                        duckdb=args.duckdb)
+    if args.out:
+        bench.save(report, args.out)
+        print(f"wrote {len(report['results'])} results to {args.out}")
+    if not args.baseline:
+        return 0
+    regressions = bench.compare(report, bench.load(args.baseline), tolerance=args.tolerance)
+    for result, before in regressions:
+        print(f"REGRESSION {result['rows']:,} {result['selectivity'] or '-'} {result['stage']}: "
+              f"p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+    print(f"{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+def cmd_verify(args):
+    failed = bench.verify(args.rows, workers=args.workers, batches=args.batches)
+    print(f"{len(failed)} builds differ from the full single-threaded build{': ' + ', '.join(failed) if failed else ''}")
+    return 1 if failed else 0
+
+
+def cmd_profile(args):
+    failed = 0
+    for page in args.pages or app_pages():
+        summary, folded = profiler.profile_page(page, interval=args.interval_ms / 1000, max_steps=args.max_steps)
+        print(os.path.relpath(page, ROOT))
+        for rerun in summary['reruns']:
+            rate = '-' if rerun['cache_hit_rate'] is None else f"{rerun['cache_hit_rate']:.0%}"
+            flag = '  ERROR' if rerun['exceptions'] else ''
+            print(f"  {rerun['wall_ms']:8.1f} ms  hits {rate:>4}  {rerun['step']}{flag}")
+            failed += bool(rerun['exceptions'])
+        for section, ms in list(summary['sections_ms'].items())[:5]:
+            print(f"  {ms:8.1f} ms  in  {section}")
+        if args.out:
+            folded_path, _ = profiler.write_profile(summary, folded, args.out)
+            print(f"  wrote {folded_path}")
+    return 1 if failed else 0
+
+
+def cmd_collector(args):
+    tracing.serve_collector(args.port, args.out, args.host)
+
+
+def cmd_feed(args):
+    from cyberdash.live import write_feed
+
+    print(f"writing {args.rate:g} incidents/s to {args.target} (Ctrl-C to stop)", flush=True)
+    try:
+        write_feed(args.target, args.year, rate=args.rate, batch=args.batch, seed=args.seed)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_serve(args):
+    from streamlit.web import cli as stcli
+
+    start_warm_up()
+    sys.argv = ['streamlit', 'run', args.script, *args.streamlit_args]
+    return stcli.main()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cyberdash')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    memory = commands.add_parser('memory', help='memory footprint before/after the compact schema')
+    memory.add_argument('--rows', type=int, default=None, help='synthetic row count (default: dashboard dataset)')
+    memory.set_defaults(func=cmd_memory)
+
+    generate = commands.add_parser('generate', help='write a synthetic dataset for CYBERDASH_DATA')
+    generate.add_argument('out', help='output directory')
+    generate.add_argument('--rows', type=int, default=None, help='row count (default: dashboard dataset)')
+    generate.add_argument('--seed', type=int, default=42)
+    generate.add_argument('--format', choices=['parquet', 'ipc', 'csv'], default='parquet')
+    generate.add_argument('--no-partition', action='store_true', help='do not partition by year')
+    generate.set_defaults(func=cmd_generate)
+
+    store = commands.add_parser('store', help='(re)build the memory-mapped store; running servers re-map it in the background from their next rerun')
+    store.add_argument('path', help='store file, e.g. $CYBERDASH_STORE_DIR/incidents.arrow')
+    store.add_argument('--rows', type=int, default=None, help='synthetic row count when CYBERDASH_DATA is unset')
+    store.add_argument('--seed', type=int, default=42)
+    store.set_defaults(func=cmd_store)
+
+    imports = commands.add_parser('imports', help='per-page import time against the budget')
+    imports.add_argument('pages', nargs='*', help='page scripts (default: every page of the app)')
+    imports.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    imports.add_argument('--repeat', type=int, default=3, help='runs per page (the fastest is kept)')
+    imports.set_defaults(func=cmd_imports)
+
+    bench_parser = commands.add_parser('bench', help='benchmark the dashboard pipeline at several dataset sizes')
+    bench_parser.add_argument('--rows', type=int, nargs='+', default=list(bench.ROWS), help='dataset sizes, e.g. 10000 1000000 10000000')
+    bench_parser.add_argument('--repeat', type=int, default=bench.REPEAT, help='timed runs per stage')
+    bench_parser.add_argument('--workers', type=int, default=1, help='also time the cube build sharded over this many processes')
+    bench_parser.add_argument('--duckdb', action='store_true', help='also time the filter and aggregations on the DuckDB backend')
+    bench_parser.add_argument('--no-export', action='store_true', help='skip the CSV export stage')
+    bench_parser.add_argument('--out', help='write the JSON results here')
+    bench_parser.add_argument('--baseline', help='JSON results to compare against; exits 1 on regressions')
+    bench_parser.add_argument('--tolerance', type=float, default=bench.TOLERANCE, help='allowed p50 growth (0.2 = 20%%)')
+    bench_parser.set_defaults(func=cmd_bench)
+
+    verify = commands.add_parser('verify', help='check the sharded and appended cube builds are bit-identical to a full build')
+    verify.add_argument('--rows', type=int, default=200_000)
+    verify.add_argument('--workers', type=int, default=2, help='processes of the sharded build')
+    verify.add_argument('--batches', type=int, default=8, help='live batches appended to half the rows')
+    verify.set_defaults(func=cmd_verify)
+
+    profile = commands.add_parser('profile', help='rerun each page headlessly with widget changes and profile the script')
+    profile.add_argument('pages', nargs='*', help='page scripts (default: every page of the app)')
+    profile.add_argument('--out', help='directory for <page>.folded (flame graph input) and <page>.json')
+    profile.add_argument('--interval-ms', type=float, default=profiler.INTERVAL * 1000, help='stack sampling interval')
+    profile.add_argument('--max-steps', type=int, default=profiler.MAX_STEPS, help='widget changes per page')
+    profile.set_defaults(func=cmd_profile)
+
+    collector = commands.add_parser('collector', help='local OTLP/HTTP JSON trace collector for CYBERDASH_TRACE_EXPORT')
+    collector.add_argument('--port', type=int, default=4318)
+    collector.add_argument('--host', default='127.0.0.1')
+    collector.add_argument('--out', help='append received spans to this JSON lines file')
+    collector.set_defaults(func=cmd_collector)
+
+    feed = commands.add_parser('feed', help='write a synthetic live feed for CYBERDASH_LIVE_FEED')
+    feed.add_argument('target', help='NDJSON file to append to, or unix:/path/to.sock to serve')
+    feed.add_argument('--year', type=int, default=YEARS[-1], help='year the incidents are dated in')
+    feed.add_argument('--rate', type=float, default=5.0, help='incidents per second')
+    feed.add_argument('--batch', type=int, default=5, help='incidents per write')
+    feed.add_argument('--seed', type=int, default=0)
+    feed.set_defaults(func=cmd_feed)
+
+    serve = commands.add_parser('serve', help='streamlit run, warming imports and the store while the server starts')
+    serve.add_argument('script', nargs='?', default=str(ROOT / 'main.py'))
+    serve.add_argument('streamlit_args', nargs=argparse.REMAINDER, help='passed on to streamlit run')
+    serve.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Headless benchmark of the dashboard data pipeline.
+
+Replays the stages a ``project/team.py`` rerun goes through (generation,
+index/cube build, single-threaded and with ``--workers`` also sharded,
+filtering, each chart's aggregation, figure construction, CSV export and the
+trend fits) at several dataset sizes and filter selectivities; ``--duckdb``
+adds the filter and aggregations on the DuckDB backend.  Every stage is timed
+``repeat`` times for p50/p95 and run once more under ``tracemalloc`` for its
+peak memory.  Results are written as JSON
+and can be compared with a saved baseline:
+
+    python -m cyberdash bench --rows 10000 1000000 --out bench.json
+    python -m cyberdash bench --baseline bench.json
+
+``verify`` checks that the sharded and the appended cube builds are
+bit-identical to the single-threaded full build:
+
+    python -m cyberdash verify --rows 1000000 --workers 4
+"""
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from cyberdash import kernels
+from cyberdash.cube import IncidentCube
+from cyberdash.downsample import downsample
+from cyberdash.export import write_export
+from cyberdash.forecast import TrendFit, batch_forecast
+from cyberdash.generator import YEARS, generate_incidents
+from cyberdash.index import BitmapIndex
+from cyberdash.parallel import pool
+from cyberdash.schema import ATTACK_TYPES, COUNTRIES, SEVERITY_LEVELS
+
+ROWS = (10_000, 1_000_000)
+REPEAT = 5
+TOLERANCE = 0.2
+NOISE_FLOOR_MS = 1.0
+
+# Sidebar states from no filter down to a single cell of every dimension
+SELECTIVITIES = {
+    'all': dict(year=None, country=None, attack_type=None, severity=None),
+    'default': dict(year=list(YEARS)[-3:], country=sorted(COUNTRIES)[:5],
+                    attack_type=None, severity=None),
+    'narrow': dict(year=list(YEARS)[-1:], country=sorted(COUNTRIES)[:1],
+                   attack_type=sorted(ATTACK_TYPES)[:1], severity=SEVERITY_LEVELS[-1:]),
+}
+
+# Chart aggregations of the dashboard, as rollups of the cube slice
+AGGREGATIONS = {
+    'totals': lambda s: s.totals(),
+    'time': lambda s: s.rollup('year'),
+    'attack_types': lambda s: s.rollup('attack_type'),
+    'countries': lambda s: s.rollup('country'),
+    'severity_by_country': lambda s: s.rollup('country', 'severity'),
+    'sectors': lambda s: s.rollup('sector'),
+    'monthly': lambda s: s.rollup('month'),
+    'heatmap': lambda s: s.crosstab('attack_type', 'sector'),
+}
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def measure(fn, repeat=REPEAT):
+    """p50/p95 wall time of ``fn()`` over ``repeat`` runs plus its peak traced memory"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': percentile_ms(samples, 50),
+        'p95_ms': percentile_ms(samples, 95),
+        'peak_mb': peak / 2**20,
+        'repeat': repeat,
+    }
+
+
+# Row-level aggregations of the filtered frame: the pandas calls against the
+# integer-code kernels returning the same tables
+ROW_AGGREGATIONS = {
+    'crosstab': (
+        lambda f: pd.crosstab(f['attack_type'], f['sector']),
+        lambda f: kernels.crosstab(f, 'attack_type', 'sector'),
+    ),
+    'groupby_country': (
+        lambda f: f.groupby('country', observed=True).agg(
+            count=('financial_impact', 'size'), financial_impact_mean=('financial_impact', 'mean'),
+            affected_users_sum=('affected_users', 'sum')),
+        lambda f: kernels.groupby(f, 'country', sum=['affected_users'], mean=['financial_impact']),
+    ),
+    'groupby_country_severity': (
+        lambda f: f.groupby(['country', 'severity'], observed=True)['financial_impact'].agg(['size', 'sum']),
+        lambda f: kernels.groupby(f, ['country', 'severity'], sum=['financial_impact']),
+    ),
+}
+
+
+def figure_builders(selection, filtered):
+    """A representative set of the dashboard's Plotly figures, as builder callables"""
+    import plotly.express as px
+
+    return {
+        'time': lambda: px.line(selection.rollup('year')['count'].reset_index(name='incidents'),
+                                x='year', y='incidents', markers=True),
+        'severity_by_country': lambda: px.bar(selection.rollup('country', 'severity')['count'].reset_index(),
+                                              x='country', y='count', color='severity'),
+        'heatmap': lambda: px.imshow(selection.crosstab('attack_type', 'sector')),
+        'scatter': lambda: px.scatter(
+            filtered.iloc[downsample(filtered, 'affected_users', 'financial_impact', 'severity')],
+            x='affected_users', y='financial_impact', color='severity', render_mode='webgl'),
+    }
+
+
+def bench_size(n_rows, selectivities=SELECTIVITIES, repeat=REPEAT, export=True, workers=1, duckdb=False):
+    """Benchmark every stage at one dataset size; returns a list of result rows"""
+    results = []
+
+    def record(stage, fn, selectivity=None, stage_repeat=repeat):
+        result = {'rows': n_rows, 'selectivity': selectivity, 'stage': stage}
+        result.update(measure(fn, stage_repeat))
+        results.append(result)
+        print(f"{n_rows:>11,}  {selectivity or '-':8}  {stage:32} "
+              f"p50 {result['p50_ms']:10.2f} ms  p95 {result['p95_ms']:10.2f} ms  peak {result['peak_mb']:8.1f} MiB")
+
+    record('generate', lambda: generate_incidents(n_rows, seed=42), stage_repeat=min(repeat, 3))
+    df = generate_incidents(n_rows, seed=42)
+    record('build_index', lambda: BitmapIndex(df), stage_repeat=min(repeat, 3))
+    record('build_cube', lambda: IncidentCube(df, workers=1), stage_repeat=min(repeat, 3))
+    if workers > 1:
+        pool(workers)
+        record(f'build_cube_sharded/{workers}', lambda: IncidentCube(df, workers=workers), stage_repeat=min(repeat, 3))
+    index, cube = BitmapIndex(df), IncidentCube(df)
+    if duckdb:
+        from cyberdash.duck import DuckDBBackend
+
+        record('build_duckdb', lambda: DuckDBBackend(df), stage_repeat=min(repeat, 3))
+        sql = DuckDBBackend(df)
+
+    for name, filters in selectivities.items():
+        record('filter', lambda: df.iloc[index.positions(**filters)], name)
+        record('cube_slice', lambda: cube.slice(**filters), name)
+        filtered = df.iloc[index.positions(**filters)]
+        selection = cube.slice(**filters)
+
+        for chart, aggregate in AGGREGATIONS.items():
+            record(f'aggregate/{chart}', lambda: aggregate(selection), name)
+        if duckdb:
+            # The same filter and aggregations as prepared DuckDB statements
+            record('sql/filter', lambda: df.iloc[sql.positions(**filters)], name)
+            sql_selection = sql.slice(**filters)
+            for chart, aggregate in AGGREGATIONS.items():
+                record(f'sql/{chart}', lambda: aggregate(sql_selection), name)
+        for chart, (pandas_path, kernel_path) in ROW_AGGREGATIONS.items():
+            record(f'rows/pandas/{chart}', lambda: pandas_path(filtered), name)
+            record(f'rows/kernel/{chart}', lambda: kernel_path(filtered), name)
+        record('aggregate/scatter_downsample',
+               lambda: downsample(filtered, 'affected_users', 'financial_impact', 'severity'), name)
+        for chart, build in figure_builders(selection, filtered).items():
+            record(f'figure/{chart}', lambda: build().to_json(), name)
+
+        yearly = selection.rollup('year')['count']
+        record('fit/trend', lambda: TrendFit.from_points(yearly.index, yearly.to_numpy()).forecast(max(yearly.index, default=0)), name)
+        record('fit/segments', lambda: batch_forecast(selection.panel(['country', 'attack_type'])), name)
+
+        if export:
+            def csv_export():
+                with open(os.devnull, 'wb') as sink:
+                    write_export(filtered, sink, 'csv')
+            record('export/csv', csv_export, name, stage_repeat=1 if len(filtered) > 1_000_000 else min(repeat, 3))
+    return results
+
+
+def run(rows=ROWS, selectivities=SELECTIVITIES, repeat=REPEAT, export=True, workers=1, duckdb=False):
+    """Benchmark every size; returns the JSON-ready report"""
+    results = []
+    for n_rows in rows:
+        results.extend(bench_size(n_rows, selectivities, repeat, export, workers, duckdb))
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def verify(n_rows, workers=2, batches=8, seed=42):
+    """Names of the cube builds that are not bit-identical to the single-threaded full build"""
+    df = generate_incidents(n_rows, seed=seed)
+    failed = []
+
+    # Sharded against single-threaded, with some rows missing their year
+    gappy = df.assign(year=df['year'].astype('Int16').mask(np.arange(n_rows) % 7 == 3))
+    if IncidentCube(gappy, workers=workers).values.tobytes() != IncidentCube(gappy, workers=1).values.tobytes():
+        failed.append(f'sharded/{workers}')
+
+    # Live appends (several batches folded at once, then one at a time) against a rebuild
+    bounds = np.linspace(n_rows // 2, n_rows, batches + 1).astype(int)
+    folds = [(bounds[0], bounds[batches // 2])] + list(zip(bounds[batches // 2:-1], bounds[batches // 2 + 1:]))
+    cube, index = IncidentCube(df.iloc[:bounds[0]], workers=1), BitmapIndex(df.iloc[:bounds[0]])
+    for start, stop in folds:
+        batch = df.iloc[start:stop].reset_index(drop=True)
+        cube, index = cube.append(batch), index.append(batch)
+    if cube.values.tobytes() != IncidentCube(df, workers=1).values.tobytes():
+        failed.append('append/cube')
+    rebuilt = BitmapIndex(df)
+    if index.n_rows != rebuilt.n_rows or any(
+            list(index.bitmaps[dim]) != list(bitmaps)
+            or any(not np.array_equal(index.bitmaps[dim][value], bits) for value, bits in bitmaps.items())
+            for dim, bitmaps in rebuilt.bitmaps.items()):
+        failed.append('append/index')
+    return failed
+
+
+def result_key(result):
+    return result['rows'], result['selectivity'], result['stage']
+
+
+def compare(report, baseline, tolerance=TOLERANCE, noise_floor_ms=NOISE_FLOOR_MS):
+    """Stages whose p50 grew by more than ``tolerance`` (and ``noise_floor_ms``) over the baseline"""
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        growth = result['p50_ms'] - before['p50_ms']
+        if growth > noise_floor_ms and result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append((result, before))
+    return regressions
+
+
+def save(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,74 @@
+"""Runtime settings, read from ``CYBERDASH_*`` environment variables."""
+import os
+
+# Incident data on local disk (CSV/Parquet/Arrow IPC file or a directory of
+# them).  Unset means the dashboards use the synthetic sample data.
+DATA_SOURCE = os.environ.get('CYBERDASH_DATA') or None
+
+# Force a file format ('csv', 'parquet', 'ipc') instead of guessing it from the suffix.
+DATA_FORMAT = os.environ.get('CYBERDASH_DATA_FORMAT') or None
+
+# Directory holding the memory-mapped Arrow IPC store shared by every process
+# on the host.  Unset keeps one @st.cache_data copy per process.
+STORE_DIR = os.environ.get('CYBERDASH_STORE_DIR') or None
+
+# Bounds of the process-wide chart cache (entries and megabytes).
+CHART_CACHE_ENTRIES = int(os.environ.get('CYBERDASH_CHART_CACHE_ENTRIES', 256))
+CHART_CACHE_MB = int(os.environ.get('CYBERDASH_CHART_CACHE_MB', 64))
+
+# Disk budget of the cached export spool files (megabytes).
+EXPORT_CACHE_MB = int(os.environ.get('CYBERDASH_EXPORT_CACHE_MB', 256))
+
+# Largest export offered for download (megabytes, by the estimate; 0: no cap).
+# Streamlit holds a served payload in memory, so this bounds what a download costs.
+EXPORT_MAX_MB = int(os.environ.get('CYBERDASH_EXPORT_MAX_MB', 200))
+
+# Where export spool files are written (default: the system temp directory).
+EXPORT_DIR = os.environ.get('CYBERDASH_EXPORT_DIR') or None
+
+# Most points drawn by the WebGL scatter plots (a deterministic downsample
+# stands in for larger selections).
+SCATTER_POINTS = int(os.environ.get('CYBERDASH_SCATTER_POINTS', 5000))
+
+# Import-time budget per page for ``python -m cyberdash imports`` (milliseconds).
+IMPORT_BUDGET_MS = int(os.environ.get('CYBERDASH_IMPORT_BUDGET_MS', 600))
+
+# Timing spans around each dashboard section ('1' to record them).  Off, a
+# span is one attribute check.
+TRACING = os.environ.get('CYBERDASH_TRACING', '').lower() in ('1', 'true', 'yes', 'on')
+
+# Spans kept in the in-process ring buffer.
+TRACE_BUFFER = int(os.environ.get('CYBERDASH_TRACE_BUFFER', 5000))
+
+# Where finished reruns are exported: a ``.jsonl`` path, or the URL of an
+# OTLP/HTTP JSON collector (e.g. http://localhost:4318/v1/traces).  Unset keeps
+# spans in the ring buffer only.
+TRACE_EXPORT = os.environ.get('CYBERDASH_TRACE_EXPORT') or None
+
+# Show the slowest-sections panel in the sidebar (for operators, not end users).
+TRACE_PANEL = os.environ.get('CYBERDASH_TRACE_PANEL', '').lower() in ('1', 'true', 'yes', 'on')
+
+# Live incident feed: a newline-delimited JSON file that is tailed, or
+# ``unix:/path/to.sock`` to read from a Unix socket.  Unset means no live data.
+LIVE_FEED = os.environ.get('CYBERDASH_LIVE_FEED') or None
+
+# Seconds between live-feed checks of each open dashboard.
+LIVE_REFRESH_SECONDS = float(os.environ.get('CYBERDASH_LIVE_REFRESH_SECONDS', 5))
+
+# Seconds after which the loaded dataset is checked for a new version in the
+# background (sessions keep the loaded one until the new one is indexed).
+# 0 turns the check off.
+REFRESH_SECONDS = float(os.environ.get('CYBERDASH_REFRESH_SECONDS', 300))
+
+# Worker processes for the sharded cube build (0 or 1: build in the script
+# thread), and the smallest dataset worth shipping to them.
+WORKERS = int(os.environ.get('CYBERDASH_WORKERS', 0))
+PARALLEL_MIN_ROWS = int(os.environ.get('CYBERDASH_PARALLEL_MIN_ROWS', 5_000_000))
+
+# Compute backend behind the filters and chart aggregations: 'pandas' (bitmap
+# index and cube over the frame) or 'duckdb' (prepared SQL on an in-process
+# DuckDB connection).
+BACKENDS = ('pandas', 'duckdb')
+BACKEND = os.environ.get('CYBERDASH_BACKEND', 'pandas').lower()
+if BACKEND not in BACKENDS:
+    raise ValueError(f'CYBERDASH_BACKEND must be one of {", ".join(BACKENDS)}, not {BACKEND!r}')
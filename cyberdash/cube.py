@@ -0,0 +1,161 @@
+"""Pre-aggregated incident cube feeding every dashboard chart.
+
+The cube is a dense array over (year, month, country, attack_type, sector,
+severity) holding, per cell, the incident count, the sum and sum of squares
+of ``financial_impact`` and the sum of ``affected_users``.  It is built once
+per dataset with the bincount kernels of ``cyberdash.kernels``; a sidebar
+selection slices it and each chart is a sum over the remaining axes, so
+rendering cost depends on the number of cells, not on the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+from cyberdash.index import column_codes
+from cyberdash.kernels import combine_codes, keyed_sums, label_table
+from cyberdash.parallel import build_workers, sharded_cube_values
+
+DIMENSIONS = ('year', 'month', 'country', 'attack_type', 'sector', 'severity')
+MEASURES = ('count', 'impact_sum', 'impact_sumsq', 'users_sum')
+
+
+class CubeSlice:
+    """A selection of the cube; rollups sum it down to one or two dimensions"""
+
+    def __init__(self, values, labels, dimensions=DIMENSIONS):
+        self.values = values
+        self.labels = labels
+        self.dimensions = dimensions
+
+    def totals(self):
+        """Measures summed over the whole selection, plus mean/std of the impact"""
+        sums = self.values.reshape(-1, len(MEASURES)).sum(axis=0)
+        return derive(pd.Series(sums, index=MEASURES))
+
+    def rollup(self, *dims):
+        """Measures grouped by ``dims`` (non-empty groups only, like ``groupby(observed=True)``)"""
+        axes = [self.dimensions.index(dim) for dim in dims]
+        other = tuple(i for i in range(len(self.dimensions)) if i not in axes)
+        grouped = self.values.sum(axis=other)
+        if axes != sorted(axes):
+            grouped = np.moveaxis(grouped, np.argsort(np.argsort(axes)), range(len(axes)))
+
+        index = pd.MultiIndex.from_product([self.labels[dim] for dim in dims], names=list(dims))
+        frame = pd.DataFrame(grouped.reshape(-1, len(MEASURES)), index=index, columns=MEASURES)
+        if len(dims) == 1:
+            frame.index = index.get_level_values(0)
+        frame = frame[frame['count'] > 0]
+        return derive(frame)
+
+    def panel(self, dims, over='year', measure='count'):
+        """One ``measure`` series per combination of ``dims`` (rows, dense) along ``over`` (columns)"""
+        dims = list(dims)
+        axes = [self.dimensions.index(dim) for dim in dims + [over]]
+        other = tuple(i for i in range(len(self.dimensions)) if i not in axes)
+        grouped = self.values[..., MEASURES.index(measure)].sum(axis=other)
+        grouped = np.moveaxis(grouped, np.argsort(np.argsort(axes)), range(len(axes)))
+
+        index = pd.MultiIndex.from_product([self.labels[dim] for dim in dims], names=dims)
+        columns = pd.Index(self.labels[over], name=over)
+        return pd.DataFrame(grouped.reshape(len(index), len(columns)), index=index, columns=columns)
+
+    def crosstab(self, row, column):
+        """Incident counts as a ``row`` x ``column`` table, like ``pd.crosstab``"""
+        axes = (self.dimensions.index(row), self.dimensions.index(column))
+        other = tuple(i for i in range(len(self.dimensions)) if i not in axes)
+        table = self.values[..., 0].sum(axis=other)
+        if axes[0] > axes[1]:
+            table = table.T
+        return label_table(table.astype(np.int64), self.labels[row], self.labels[column], row, column)
+
+
+def derive(stats):
+    """Add ``impact_mean``/``impact_std`` and an integer ``count`` to summed measures"""
+    stats = stats.copy()
+    count = stats['count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats['impact_mean'] = stats['impact_sum'] / count
+        variance = (stats['impact_sumsq'] - stats['impact_sum'] ** 2 / count) / (count - 1)
+        stats['impact_std'] = np.sqrt(np.maximum(variance, 0))
+    if isinstance(stats, pd.DataFrame):
+        stats['count'] = count.astype(np.int64)
+    return stats
+
+
+class IncidentCube:
+    """Dense cube of incident measures over every dashboard dimension"""
+
+    def __init__(self, df, dimensions=DIMENSIONS, workers=None):
+        self.dimensions = dimensions
+        self.labels = {}
+        codes = []
+        for dim in dimensions:
+            dim_codes, self.labels[dim] = column_codes(df[dim])
+            codes.append(dim_codes)
+
+        shape = tuple(len(self.labels[dim]) for dim in dimensions)
+        workers = build_workers(len(df)) if workers is None else workers
+        if workers > 1:
+            # Large datasets: sharded along the first axis over a process pool, same result
+            self.values = sharded_cube_values(
+                codes, df['financial_impact'].to_numpy(dtype=np.float64),
+                df['affected_users'].to_numpy(dtype=np.float64), shape, workers
+            )
+            return
+        self.values = np.zeros(shape + (len(MEASURES),))
+        self._add(df, codes)
+
+    def _add(self, df, codes, in_order=False):
+        """Add the measures of ``df``'s rows to the cells given by per-dimension ``codes``"""
+        shape = self.values.shape[:-1]
+        cells, valid = combine_codes(codes, shape)
+        impact = df['financial_impact'].to_numpy(dtype=np.float64)[valid]
+        users = df['affected_users'].to_numpy(dtype=np.float64)[valid]
+        if in_order:
+            # Row by row onto the existing sums, the order a full build adds them
+            # in, so an appended cube is bit-identical to a rebuilt one
+            np.add.at(self.values.reshape(-1, len(MEASURES)), cells,
+                      np.stack([np.ones(len(cells)), impact, impact * impact, users], axis=-1))
+            return
+        # A small batch only sums the cells it touches instead of the whole cube
+        cells, sums = keyed_sums(cells, int(np.prod(shape)), [impact, impact * impact, users])
+        self.values.reshape(-1, len(MEASURES))[cells] += sums
+
+    def append(self, batch):
+        """Cube with ``batch``'s rows added; an axis grows when the batch brings a new label"""
+        cube = IncidentCube.__new__(IncidentCube)
+        cube.dimensions = self.dimensions
+        cube.labels = {}
+        for dim in self.dimensions:
+            labels, known = self.labels[dim], set(self.labels[dim])
+            new = [getattr(value, 'item', lambda: value)() for value in pd.unique(batch[dim].to_numpy())
+                   if value == value and value not in known]
+            cube.labels[dim] = labels if not new else (
+                labels + new if isinstance(batch[dim].dtype, pd.CategoricalDtype) else sorted(labels + new)
+            )
+
+        if all(cube.labels[dim] is self.labels[dim] for dim in self.dimensions):
+            cube.values = self.values.copy()
+        else:
+            shape = tuple(len(cube.labels[dim]) for dim in self.dimensions)
+            cube.values = np.zeros(shape + (len(MEASURES),))
+            cube.values[np.ix_(*[pd.Index(cube.labels[dim]).get_indexer(self.labels[dim])
+                                 for dim in self.dimensions])] = self.values
+        cube._add(batch, [pd.Index(cube.labels[dim]).get_indexer(batch[dim].to_numpy())
+                          for dim in self.dimensions], in_order=True)
+        return cube
+
+    def slice(self, **selection):
+        """Select labels per dimension (``dim=values``; ``None`` keeps the whole axis)"""
+        picks = []
+        labels = {}
+        for dim in self.dimensions:
+            selected = selection.get(dim)
+            if selected is None:
+                picks.append(np.arange(len(self.labels[dim])))
+                labels[dim] = self.labels[dim]
+                continue
+            selected = set(selected)
+            positions = [i for i, label in enumerate(self.labels[dim]) if label in selected]
+            picks.append(np.array(positions, dtype=np.intp))
+            labels[dim] = [self.labels[dim][i] for i in positions]
+        return CubeSlice(self.values[np.ix_(*picks)], labels, self.dimensions)
@@ -0,0 +1,185 @@
+"""DuckDB query backend.
+
+With ``CYBERDASH_BACKEND=duckdb`` the sidebar filter and the chart
+aggregations run as SQL on an in-process DuckDB connection (multi-threaded,
+vectorized) instead of on the bitmap index and the cube.  The incident frame
+is registered as an Arrow table of integer label codes and the two measures,
+so grouping and filtering never compare strings.  Every query shape (grouping
+and number of values selected per filter) is a ``PREPARE``d statement, made
+once per dataset version and ``EXECUTE``d with the selection's codes on each
+rerun.
+
+``DuckDBSlice`` answers ``totals``, ``rollup``, ``crosstab`` and ``panel``
+with the frames ``CubeSlice`` returns (same index, labels and columns, rows
+missing a label left out; sums may differ in the last bits, being added in
+another order), so the pages do not depend on the backend.
+"""
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cyberdash.cube import DIMENSIONS, MEASURES, CubeSlice
+from cyberdash.index import column_codes
+from cyberdash.memo import LRUCache
+
+TABLE = 'incidents'
+STATEMENT_CACHE_ENTRIES = 256
+_statement_names = itertools.count()
+
+
+class DuckDBBackend:
+    """One dataset version on a DuckDB connection, with its prepared statements"""
+
+    def __init__(self, df, dimensions=DIMENSIONS):
+        self.dimensions = dimensions
+        self.labels = {}
+        self.codes = {}
+        columns = {}
+        for dim in dimensions:
+            codes, self.labels[dim] = column_codes(df[dim])
+            self.codes[dim] = {label: code for code, label in enumerate(self.labels[dim])}
+            columns[dim] = codes.astype(np.int32)
+        # Dimensions with missing labels (code -1), whose rows the cube leaves out
+        self.missing = [dim for dim in dimensions if (columns[dim] < 0).any()]
+        self._connect(self._arrow(df, columns, 0))
+
+    def _arrow(self, df, columns, first_row):
+        """Arrow table of the dimension ``columns`` (codes), row positions from ``first_row`` and the measures"""
+        import pyarrow as pa
+
+        columns['row'] = np.arange(first_row, first_row + len(df), dtype=np.int64)
+        columns['impact'] = df['financial_impact'].to_numpy(dtype=np.float64)
+        columns['users'] = df['affected_users'].to_numpy(dtype=np.float64)
+        return pa.table(columns)
+
+    def _connect(self, table):
+        import duckdb
+
+        self.table = table
+        self.con = duckdb.connect()
+        self.con.register(TABLE, table)
+        # One connection keeps one set of prepared statements for every session;
+        # DuckDB parallelizes inside each query
+        self._lock = threading.Lock()
+        self._statements = LRUCache(max_entries=STATEMENT_CACHE_ENTRIES, sizeof=lambda name: 0,
+                                    on_evict=lambda name: self.con.execute(f'DEALLOCATE {name}'))
+
+    def append(self, batch):
+        """Backend over these rows followed by ``batch`` (``None`` if the batch brings a new label)
+
+        Only the batch is encoded; the new table chains this one's Arrow
+        columns without copying them.
+        """
+        import pyarrow as pa
+
+        columns = {}
+        for dim in self.dimensions:
+            values = batch[dim]
+            codes = pd.Index(self.labels[dim]).get_indexer(values.to_numpy())
+            if ((codes < 0) & values.notna().to_numpy()).any():
+                return None
+            columns[dim] = codes.astype(np.int32)
+        backend = DuckDBBackend.__new__(DuckDBBackend)
+        backend.dimensions, backend.labels, backend.codes = self.dimensions, self.labels, self.codes
+        backend.missing = [dim for dim in self.dimensions if dim in self.missing or (columns[dim] < 0).any()]
+        backend._connect(pa.concat_tables([self.table, self._arrow(batch, columns, self.table.num_rows)]))
+        return backend
+
+    def selection_codes(self, **selection):
+        """Codes selected per dimension (``None``: no filter, as when every label is selected)"""
+        codes = {}
+        for dim, selected in selection.items():
+            if selected is None:
+                continue
+            lookup = self.codes[dim]
+            picked = sorted({lookup[label] for label in selected if label in lookup})
+            if len(picked) < len(lookup):
+                codes[dim] = picked
+        return codes
+
+    def statement(self, select, codes):
+        """Name of the prepared statement for ``select`` (dims to group by, or ``None`` for row positions)"""
+        arities = tuple((dim, len(codes[dim])) for dim in self.dimensions if dim in codes)
+        return self._statements.get_or_compute((select, arities), lambda: self._prepare(select, arities))
+
+    def _prepare(self, select, arities):
+        conditions = []
+        params = itertools.count(1)
+        for dim, arity in arities:
+            if arity == 0:
+                conditions.append('FALSE')
+            else:
+                conditions.append(f'"{dim}" IN ({", ".join(f"${next(params)}" for _ in range(arity))})')
+        if select is not None:
+            # Aggregates skip rows missing any label, as the cube does
+            conditions += [f'"{dim}" >= 0' for dim in self.missing]
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        if select is None:
+            sql = f'SELECT "row" FROM {TABLE}{where} ORDER BY "row"'
+        else:
+            dims = ', '.join(f'"{dim}"' for dim in select)
+            sql = (f'SELECT {dims + ", " if dims else ""}count(*)::DOUBLE, coalesce(sum(impact), 0), '
+                   f'coalesce(sum(impact * impact), 0), coalesce(sum(users), 0) FROM {TABLE}{where}')
+            if dims:
+                sql += f' GROUP BY {dims} ORDER BY {dims}'
+        name = f'cyberdash_{next(_statement_names)}'
+        self.con.execute(f'PREPARE {name} AS {sql}')
+        return name
+
+    def execute(self, select, codes):
+        """Run the prepared statement for ``select`` with the selection's codes; a list of result columns"""
+        values = [int(code) for dim in self.dimensions if dim in codes for code in codes[dim]]
+        with self._lock:
+            name = self.statement(select, codes)
+            # The parameters are integer codes made here, never user text
+            call = f'EXECUTE {name}({", ".join(map(str, values))})' if values else f'EXECUTE {name}'
+            return [np.asarray(column) for column in self.con.execute(call).fetchnumpy().values()]
+
+    def positions(self, **selection):
+        """Row positions (for ``df.iloc``) matching the selection, like ``BitmapIndex.positions``"""
+        return self.execute(None, self.selection_codes(**selection))[0].astype(np.int64)
+
+    def slice(self, **selection):
+        return DuckDBSlice(self, selection)
+
+
+class DuckDBSlice:
+    """A selection answered by SQL; the methods of ``CubeSlice``"""
+
+    def __init__(self, backend, selection):
+        self.backend = backend
+        self.codes = backend.selection_codes(**selection)
+        # Labels of the slice, as the cube slice keeps them: selected ones in label order
+        self.positions = {}
+        self.labels = {}
+        for dim in backend.dimensions:
+            selected = self.codes.get(dim, range(len(backend.labels[dim])))
+            self.labels[dim] = [backend.labels[dim][code] for code in selected]
+            self.positions[dim] = np.full(len(backend.labels[dim]), -1, dtype=np.intp)
+            self.positions[dim][list(selected)] = np.arange(len(selected))
+
+    def grid(self, dims):
+        """Measures grouped by ``dims`` as a dense cube slice over those dims"""
+        dims = tuple(dims)
+        result = self.backend.execute(dims, self.codes)
+        values = np.zeros(tuple(len(self.labels[dim]) for dim in dims) + (len(MEASURES),))
+        sums = np.stack(result[len(dims):], axis=-1)
+        if dims:
+            values[tuple(self.positions[dim][codes] for dim, codes in zip(dims, result))] = sums
+        else:
+            values[:] = sums[0]
+        return CubeSlice(values, {dim: self.labels[dim] for dim in dims}, dims)
+
+    def totals(self):
+        return self.grid(()).totals()
+
+    def rollup(self, *dims):
+        return self.grid(dims).rollup(*dims)
+
+    def panel(self, dims, over='year', measure='count'):
+        return self.grid(tuple(dims) + (over,)).panel(dims, over, measure)
+
+    def crosstab(self, row, column):
+        return self.grid((row, column)).crosstab(row, column)
@@ -0,0 +1,257 @@
+"""Shared data engine behind every dashboard page.
+
+All pages, whatever their locale, read the same canonical incident frame and
+the filter index, cube and sort index built on it.  Engines are kept per
+dataset version in a process-wide LRU, so the dataset is loaded and indexed
+once per process rather than once per page.
+
+With a live feed (``CYBERDASH_LIVE_FEED``) the current engine is the loaded
+one with the feed's micro-batches appended, each fold producing a new
+engine that extends its parent's index, cube, DuckDB table and sort index and
+keeps the batches beside the loaded frame rather than copying it (a
+memory-mapped store stays shared); pages take rows by position with ``rows``.
+
+The loaded dataset is served stale-while-revalidate (``cyberdash.refresh``):
+once it is ``CYBERDASH_REFRESH_SECONDS`` old, the source's file stamps are
+checked in the background and a changed source is reloaded and indexed there,
+then swapped in for the next rerun.  The memory-mapped store is stat-ed on
+every rerun instead, so a rebuilt store is picked up without waiting.
+"""
+import time
+from bisect import bisect_right
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cyberdash.config import BACKEND, DATA_FORMAT, DATA_SOURCE, LIVE_FEED, REFRESH_SECONDS, STORE_DIR
+from cyberdash.cube import IncidentCube
+from cyberdash.generator import YEARS, generate_incidents
+from cyberdash.index import BitmapIndex
+from cyberdash.ingest import available_years, load_incidents
+from cyberdash.memo import LRUCache
+from cyberdash.refresh import StaleWhileRevalidate
+from cyberdash.store import IncidentStore
+from cyberdash.table import SortIndex
+
+ENGINE_CACHE_ENTRIES = 4
+# Appended live batches are merged into one frame once there are this many
+COMPACT_CHUNKS = 32
+
+
+class DashboardEngine:
+    """One dataset version with its filter index, cube and sort index"""
+
+    def __init__(self, df, data_key=None, version='sample'):
+        # The loaded frame, then the live batches appended to it
+        self.frames = [df]
+        self.data_key = data_key
+        # Key of the loaded dataset and the first row of each live batch appended to it
+        self.base_key = data_key
+        self.batch_starts = ()
+        # Label of the loaded dataset version and when it was loaded, for the sidebar
+        self.version = version
+        self.loaded_at = time.time()
+
+    @cached_property
+    def df(self):
+        """All rows as one frame (a copy once live batches are appended; only built where needed)"""
+        return self.frames[0] if len(self.frames) == 1 else pd.concat(self.frames, ignore_index=True)
+
+    @property
+    def n_rows(self):
+        return sum(len(frame) for frame in self.frames)
+
+    @property
+    def columns(self):
+        return self.frames[0].columns
+
+    def rows(self, positions):
+        """Rows at ``positions``, in that order, taken from the frames they are in"""
+        if len(self.frames) == 1 or 'df' in self.__dict__:
+            return self.df.iloc[positions]
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = np.cumsum([0] + [len(frame) for frame in self.frames])
+        frame_of = np.searchsorted(starts, positions, side='right') - 1
+        order = np.argsort(frame_of, kind='stable')
+        grouped = positions[order]
+        cuts = np.searchsorted(frame_of[order], np.arange(len(self.frames) + 1))
+        parts = [frame.iloc[grouped[a:b] - start] for frame, start, a, b
+                 in zip(self.frames, starts, cuts[:-1], cuts[1:]) if b > a]
+        if not parts:
+            return self.frames[0].iloc[:0]
+        rows = pd.concat(parts, ignore_index=True)
+        rows.index = grouped
+        return rows.iloc[np.argsort(order, kind='stable')]
+
+    @cached_property
+    def index(self):
+        """Bitmap filter index"""
+        return BitmapIndex(self.df)
+
+    @cached_property
+    def cube(self):
+        """Pre-aggregated cube behind every chart and metric"""
+        return IncidentCube(self.df)
+
+    @cached_property
+    def sql(self):
+        """DuckDB connection over the frame, for ``CYBERDASH_BACKEND=duckdb``"""
+        from cyberdash.duck import DuckDBBackend
+
+        return DuckDBBackend(self.df)
+
+    @cached_property
+    def sort_index(self):
+        """Per-column argsorts for the paginated table"""
+        return SortIndex(self.frames[0], self.frames[1:])
+
+    def values(self, dim):
+        """Canonical labels of a dimension present in the data"""
+        return list((self.sql if BACKEND == 'duckdb' else self.cube).labels[dim])
+
+    def positions(self, **selection):
+        """Row positions (for ``df.iloc``) matching the sidebar selection"""
+        return (self.sql if BACKEND == 'duckdb' else self.index).positions(**selection)
+
+    def slice(self, **selection):
+        """The selection's aggregates: a cube slice, or the same queries in SQL"""
+        return (self.sql if BACKEND == 'duckdb' else self.cube).slice(**selection)
+
+    def append(self, batch, sizes=None):
+        """New engine with ``batch``'s rows appended; a built index, cube, DuckDB table or sort index is extended
+
+        The loaded frame is not copied: the batch is kept as a frame of its own
+        (appended batches are merged once there are many of them).  ``sizes``
+        are the row counts of the live batches ``batch`` is made of (default:
+        it is one), each keeping its own start for ``data_key_for``.
+        """
+        sizes = [len(batch)] if sizes is None else sizes
+        starts = self.n_rows + np.cumsum([0, *sizes[:-1]])
+        batch_starts = self.batch_starts + tuple(int(start) for start in starts)
+        engine = DashboardEngine(self.frames[0], (self.base_key, 'live', len(batch_starts)))
+        engine.frames = self.frames + [batch]
+        if len(engine.frames) > COMPACT_CHUNKS + 1:
+            engine.frames = [self.frames[0], pd.concat(engine.frames[1:], ignore_index=True)]
+        engine.base_key, engine.batch_starts = self.base_key, batch_starts
+        engine.version, engine.loaded_at = self.version, self.loaded_at
+        for name in ('index', 'cube', 'sql'):
+            if name in self.__dict__:
+                extended = self.__dict__[name].append(batch)
+                if extended is not None:
+                    engine.__dict__[name] = extended
+        if 'sort_index' in self.__dict__:
+            engine.__dict__['sort_index'] = self.sort_index.append(batch, engine.frames)
+        return engine
+
+    def data_key_for(self, positions):
+        """Dataset version as seen by a selection: appended batches it has no row in don't change it"""
+        batches = bisect_right(self.batch_starts, positions[-1]) if len(positions) else 0
+        return (self.base_key, 'live', batches) if batches else self.base_key
+
+
+# Stale-while-revalidate holders of the loaded engines, per source and years
+ENGINES = LRUCache(max_entries=ENGINE_CACHE_ENTRIES, sizeof=lambda holder: 0)
+
+
+def load_data(years=None):
+    """Incident files from CYBERDASH_DATA for the given years, or the sample data"""
+    if DATA_SOURCE:
+        return load_incidents(DATA_SOURCE, years=years, format=DATA_FORMAT)
+    return generate_incidents(seed=42)
+
+
+@lru_cache(maxsize=None)
+def source_years():
+    """Years available in the data source"""
+    return available_years(DATA_SOURCE, format=DATA_FORMAT) if DATA_SOURCE else list(YEARS)
+
+
+def data_years():
+    """Years available in the data source and the live feed"""
+    if LIVE_FEED:
+        return sorted(set(source_years()) | live_ingest().years)
+    return source_years()
+
+
+@lru_cache(maxsize=None)
+def live_ingest():
+    """Process-wide reader of the live feed"""
+    from cyberdash.live import LiveIngest, open_feed
+
+    return LiveIngest(open_feed(LIVE_FEED))
+
+
+@lru_cache(maxsize=None)
+def incident_store():
+    """Memory-mapped incident store shared by every session and server process"""
+    return IncidentStore(Path(STORE_DIR) / 'incidents.arrow', build=load_data)
+
+
+def current_engine(years=None):
+    """Engine for the current dataset version (``years`` narrows what a data source reads)"""
+    engine = base_engine(years)
+    return live_ingest().engine(engine) if LIVE_FEED else engine
+
+
+def base_engine(years=None):
+    """Engine for the loaded dataset, without live data"""
+    return engine_holder(years).get()
+
+
+def engine_holder(years=None):
+    """Stale-while-revalidate holder of the loaded engine for ``years``"""
+    if STORE_DIR:
+        return ENGINES.get_or_compute('store', lambda: StaleWhileRevalidate(
+            load_store_engine, lambda: incident_store().stamp(), REFRESH_SECONDS, prepare=prepare_engine,
+            watch=True))
+    years = tuple(sorted(set(years))) if DATA_SOURCE and years is not None else None
+    return ENGINES.get_or_compute(years, lambda: StaleWhileRevalidate(
+        lambda fingerprint: load_source_engine(years, fingerprint), source_fingerprint, REFRESH_SECONDS,
+        prepare=prepare_engine))
+
+
+def load_store_engine(fingerprint):
+    df, data_key = incident_store().snapshot()
+    return DashboardEngine(df, data_key, data_key.strftime('%Y-%m-%d %H:%M'))
+
+
+def load_source_engine(years, fingerprint):
+    if not DATA_SOURCE:
+        return DashboardEngine(load_data(), None)
+    # New files may add years to the sidebar
+    source_years.cache_clear()
+    newest = max((mtime for _, mtime, _ in fingerprint), default=0)
+    return DashboardEngine(load_data(years), (years, hash(fingerprint)),
+                           time.strftime('%Y-%m-%d %H:%M', time.localtime(newest / 1e9)))
+
+
+def source_fingerprint():
+    """``(path, mtime_ns, size)`` of every file in the data source; the sample data never changes"""
+    if not DATA_SOURCE:
+        return 'sample'
+    root = Path(DATA_SOURCE)
+    files = [path for path in sorted(root.rglob('*')) if path.is_file()] if root.is_dir() else [root]
+    return tuple((str(path), stat.st_mtime_ns, stat.st_size) for path, stat in ((path, path.stat()) for path in files))
+
+
+def data_status(years=None):
+    """Version, load time and whether a background reload is running, for the sidebar"""
+    holder = engine_holder(years)
+    engine = holder.get()
+    return {'version': engine.version, 'loaded_at': engine.loaded_at, 'refreshing': holder.refreshing,
+            'error': holder.error}
+
+
+def prepare_engine(engine):
+    """Build the index and cube (or DuckDB table) and the sort index of ``engine``"""
+    for name in (('sql',) if BACKEND == 'duckdb' else ('index', 'cube')) + ('sort_index',):
+        getattr(engine, name)
+
+
+def warm_engine(years=None):
+    """Build the engine and all of its indexes ahead of the first request"""
+    engine = current_engine(years)
+    prepare_engine(engine)
+    return engine
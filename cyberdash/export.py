@@ -0,0 +1,151 @@
+"""On-demand, chunked export of the filtered incidents.
+
+Nothing is serialized while the dashboard renders: the download button gets
+a callable that Streamlit only invokes when the button is clicked.  Rows are
+streamed in fixed-size chunks (CSV, gzip-compressed CSV or Parquet row
+groups) into a spool file on disk, so writing the export holds at most one
+chunk in memory.  Spool files are cached per page, dataset version, filter
+state and format, and deleted when evicted.  Serving is not bounded that
+way: Streamlit reads the whole payload into memory, so pages only offer
+exports whose estimated size is within ``CYBERDASH_EXPORT_MAX_MB``
+(``export_too_large``).
+"""
+import atexit
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+from collections import namedtuple
+
+from cyberdash.config import EXPORT_CACHE_MB, EXPORT_DIR, EXPORT_MAX_MB
+from cyberdash.memo import LRUCache
+
+ExportFormat = namedtuple('ExportFormat', 'label mime suffix')
+ExportEstimate = namedtuple('ExportEstimate', 'rows bytes')
+
+EXPORT_FORMATS = {
+    'csv': ExportFormat('CSV', 'text/csv', '.csv'),
+    'csv.gz': ExportFormat('CSV (gzip)', 'application/gzip', '.csv.gz'),
+    'parquet': ExportFormat('Parquet', 'application/vnd.apache.parquet', '.parquet'),
+}
+
+CHUNK_ROWS = 100_000
+ESTIMATE_SAMPLE_ROWS = 2_000
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Spool file paths, bounded by their size on disk
+EXPORT_CACHE = LRUCache(max_entries=8, max_bytes=EXPORT_CACHE_MB * 2**20,
+                        sizeof=os.path.getsize, on_evict=_remove)
+atexit.register(EXPORT_CACHE.clear)
+
+
+def iter_chunks(df, chunk_rows=CHUNK_ROWS):
+    """Consecutive row slices of at most ``chunk_rows`` rows (one empty slice for an empty frame)"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def iter_csv(df, chunk_rows=CHUNK_ROWS):
+    """CSV text chunk by chunk, header on the first chunk only"""
+    for i, chunk in enumerate(iter_chunks(df, chunk_rows)):
+        yield chunk.to_csv(index=False, header=i == 0)
+
+
+def write_export(df, fileobj, format='csv', chunk_rows=CHUNK_ROWS):
+    """Serialize ``df`` into a binary file object, ``chunk_rows`` rows at a time"""
+    if format == 'csv':
+        for text in iter_csv(df, chunk_rows):
+            fileobj.write(text.encode('utf-8'))
+    elif format == 'csv.gz':
+        with gzip.GzipFile(fileobj=fileobj, mode='wb') as gz:
+            for text in iter_csv(df, chunk_rows):
+                gz.write(text.encode('utf-8'))
+    elif format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(fileobj, schema) as writer:
+            for chunk in iter_chunks(df, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        raise ValueError(f"Unknown export format {format!r}; expected one of {list(EXPORT_FORMATS)}")
+
+
+def export_bytes(df, format='csv'):
+    """The whole export payload as bytes (small frames only)"""
+    buffer = io.BytesIO()
+    write_export(df, buffer, format)
+    return buffer.getvalue()
+
+
+def spool_export(df, format='csv', name=None):
+    """Stream the export into a spool file and return its path"""
+    fd, path = tempfile.mkstemp(prefix=name or 'export-', suffix=EXPORT_FORMATS[format].suffix, dir=EXPORT_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as fileobj:
+            write_export(df, fileobj, format)
+    except BaseException:
+        _remove(path)
+        raise
+    return path
+
+
+def lazy_export(take, positions, format, key):
+    """Zero-argument callable for ``st.download_button(data=...)``, spooled and cached under ``key``
+
+    The rows exported are ``take(positions)``, taken when the button is
+    clicked rather than on every rerun.
+    """
+    key = key + (format,)
+    name = hashlib.sha1(repr(key).encode()).hexdigest()[:16] + '-'
+
+    def payload():
+        while True:
+            path = EXPORT_CACHE.get_or_compute(key, lambda: spool_export(take(positions), format, name))
+            try:
+                with open(path, 'rb') as fileobj:
+                    data = fileobj.read()
+            except FileNotFoundError:
+                # evicted between lookup and open
+                EXPORT_CACHE.discard(key)
+                continue
+            if key not in EXPORT_CACHE:
+                _remove(path)
+            return data
+
+    return payload
+
+
+def estimate_export(take, positions, format='csv', sample_rows=ESTIMATE_SAMPLE_ROWS):
+    """Row count and approximate payload size of exporting ``take(positions)``, from serializing an evenly spaced sample"""
+    rows = len(positions)
+    if rows == 0:
+        return ExportEstimate(0, len(export_bytes(take(positions), format)))
+    step = max(rows // sample_rows, 1)
+    sample = take(positions[::step])
+    return ExportEstimate(rows, int(len(export_bytes(sample, format)) * rows / len(sample)))
+
+
+def export_too_large(estimate, max_mb=EXPORT_MAX_MB):
+    """Whether an export estimated by ``estimate_export`` is over the download cap"""
+    return bool(max_mb) and estimate.bytes > max_mb * 2**20
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:,.0f} {unit}" if unit == 'B' else f"{n:,.1f} {unit}"
+        n /= 1024
+
+
+def export_file_name(stem, format):
+    return stem + EXPORT_FORMATS[format].suffix
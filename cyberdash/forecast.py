@@ -0,0 +1,161 @@
+"""Closed-form linear trend forecasts with prediction intervals.
+
+A ``TrendFit`` keeps only the running sums of an ordinary least-squares line
+(n, sum x, sum y, sum x^2, sum xy, sum y^2), so adding or removing a point and
+merging two fits are O(1) and the slope, intercept and residual variance are
+read straight off the sums.  ``batch_forecast`` fits many series sharing the
+same x in a single stacked least-squares solve.
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+HORIZON = 2
+LEVEL = 0.95
+
+
+def t_quantile(p, df):
+    """Quantile of Student's t distribution (exact for df <= 2, Cornish-Fisher beyond)"""
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    return (z
+            + (z**3 + z) / (4 * df)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * df**4))
+
+
+class TrendFit:
+    """Least-squares line ``y = intercept + slope * x`` held as sufficient statistics"""
+
+    __slots__ = ('n', 'sx', 'sy', 'sxx', 'sxy', 'syy')
+
+    def __init__(self, n=0, sx=0.0, sy=0.0, sxx=0.0, sxy=0.0, syy=0.0):
+        self.n, self.sx, self.sy, self.sxx, self.sxy, self.syy = n, sx, sy, sxx, sxy, syy
+
+    @classmethod
+    def from_points(cls, xs, ys):
+        """Fit over paired sequences of x and y"""
+        fit = cls()
+        for x, y in zip(xs, ys):
+            fit.add(x, y)
+        return fit
+
+    def add(self, x, y, sign=1):
+        """Add one observation (``sign=-1`` removes it)"""
+        x, y = float(x), float(y)
+        self.n += sign
+        self.sx += sign * x
+        self.sy += sign * y
+        self.sxx += sign * x * x
+        self.sxy += sign * x * y
+        self.syy += sign * y * y
+        return self
+
+    def remove(self, x, y):
+        """Remove one previously added observation"""
+        return self.add(x, y, sign=-1)
+
+    def __add__(self, other):
+        return TrendFit(*(getattr(self, s) + getattr(other, s) for s in self.__slots__))
+
+    def __repr__(self):
+        return f'TrendFit(n={self.n}, slope={self.slope:.4g}, intercept={self.intercept:.4g})'
+
+    @property
+    def sxx_centered(self):
+        return self.sxx - self.sx * self.sx / self.n if self.n else 0.0
+
+    @property
+    def ready(self):
+        """Whether the line is determined (two or more distinct x)"""
+        return self.n >= 2 and self.sxx_centered > 0
+
+    @property
+    def slope(self):
+        if not self.ready:
+            return 0.0
+        return (self.sxy - self.sx * self.sy / self.n) / self.sxx_centered
+
+    @property
+    def intercept(self):
+        return (self.sy - self.slope * self.sx) / self.n if self.n else 0.0
+
+    @property
+    def residual_variance(self):
+        """Unbiased residual variance (NaN with fewer than three points)"""
+        if self.n < 3 or not self.ready:
+            return math.nan
+        sse = self.syy - self.intercept * self.sy - self.slope * self.sxy
+        return max(sse, 0.0) / (self.n - 2)
+
+    def predict(self, x):
+        return self.intercept + self.slope * x
+
+    def interval(self, x, level=LEVEL):
+        """Prediction interval ``(lower, upper)`` for a new observation at ``x``"""
+        variance = self.residual_variance
+        if math.isnan(variance):
+            return math.nan, math.nan
+        mean_x = self.sx / self.n
+        se = math.sqrt(variance * (1 + 1 / self.n + (x - mean_x) ** 2 / self.sxx_centered))
+        half = t_quantile(0.5 + level / 2, self.n - 2) * se
+        centre = self.predict(x)
+        return centre - half, centre + half
+
+    def forecast(self, last_x, horizon=HORIZON, level=LEVEL):
+        """Predictions and interval bounds for the ``horizon`` steps after ``last_x``"""
+        rows = []
+        for x in range(int(last_x) + 1, int(last_x) + 1 + horizon):
+            lower, upper = self.interval(x, level)
+            rows.append((x, self.predict(x), lower, upper))
+        return pd.DataFrame(rows, columns=['x', 'prediction', 'lower', 'upper'])
+
+
+def batch_forecast(panel, horizon=HORIZON, level=LEVEL):
+    """Fit a line to every row of ``panel`` (series x years) in one solve
+
+    Returns one row per series with its total, latest value, slope, growth
+    (slope relative to the series mean) and the forecast with prediction
+    interval ``horizon`` steps after the last column.
+    """
+    xs = panel.columns.to_numpy(dtype=np.float64)
+    ys = panel.to_numpy(dtype=np.float64)
+    n = len(xs)
+    target = xs[-1] + horizon if n else np.nan
+    result = pd.DataFrame(index=panel.index)
+    result['total'] = ys.sum(axis=1)
+    result['latest'] = ys[:, -1] if n else np.nan
+
+    if n < 2 or np.ptp(xs) == 0:
+        for column in ('slope', 'growth', 'forecast', 'lower', 'upper'):
+            result[column] = np.nan
+        return result
+
+    # Centre x so the normal equations stay well conditioned for calendar years
+    mean_x = xs.mean()
+    design = np.column_stack([np.ones(n), xs - mean_x])
+    coef, _, _, _ = np.linalg.lstsq(design, ys.T, rcond=None)
+    intercept, slope = coef
+    forecast = intercept + slope * (target - mean_x)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if n > 2:
+            residuals = ys - (design @ coef).T
+            variance = (residuals ** 2).sum(axis=1) / (n - 2)
+            sxx = ((xs - mean_x) ** 2).sum()
+            se = np.sqrt(variance * (1 + 1 / n + (target - mean_x) ** 2 / sxx))
+            half = t_quantile(0.5 + level / 2, n - 2) * se
+        else:
+            half = np.full(len(ys), np.nan)
+        result['slope'] = slope
+        result['growth'] = slope / ys.mean(axis=1)
+    result['forecast'] = forecast
+    result['lower'] = forecast - half
+    result['upper'] = forecast + half
+    return result
@@ -0,0 +1,71 @@
+"""Columnar synthetic incident generator.
+
+Every column is drawn as a whole array from a seeded ``numpy.random.Generator``
+instead of building one dict per incident, so the same function serves the
+dashboards (~12k rows) and load tests (10M+ rows).
+"""
+import numpy as np
+import pandas as pd
+
+from cyberdash.schema import ATTACK_TYPES, COUNTRIES, SECTORS, SEVERITY_LEVELS, apply_schema
+
+YEARS = range(2015, 2025)
+
+SEVERITY_P = [0.3, 0.4, 0.2, 0.1]
+
+
+def year_counts(rng, n_years, n_rows=None):
+    """Number of incidents per year, growing towards recent years"""
+    weights = 800 + np.arange(n_years) * 150
+    if n_rows is None:
+        return weights + rng.integers(-100, 200, size=n_years)
+    return rng.multinomial(n_rows, weights / weights.sum())
+
+
+def random_dates(rng, year, counts):
+    """A uniformly random day within each row's year (Dec 31 excluded, as before)"""
+    starts = (np.asarray(year) - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    ends = (np.asarray(year) - 1970 + 1).astype('datetime64[Y]').astype('datetime64[D]')
+    spans = (ends - starts).astype(np.int64) - 1
+    offsets = rng.integers(0, np.repeat(spans, counts))
+    return np.repeat(starts, counts) + offsets.astype('timedelta64[D]')
+
+
+def random_categorical(rng, labels, n, p=None):
+    """Draw ``n`` codes and wrap them as a Categorical without materializing strings"""
+    if p is None:
+        codes = rng.integers(0, len(labels), size=n, dtype=np.int8)
+    else:
+        codes = rng.choice(len(labels), size=n, p=p).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def generate_incidents(n_rows=None, seed=42, years=YEARS, countries=COUNTRIES,
+                       attack_types=ATTACK_TYPES, sectors=SECTORS, severity_levels=SEVERITY_LEVELS):
+    """Generate sample cybersecurity threat data
+
+    With ``n_rows=None`` each year gets ``800 + 150 * k`` incidents plus noise,
+    matching the original dashboard dataset; otherwise ``n_rows`` incidents are
+    split across the years with the same growth weights.
+    """
+    rng = np.random.default_rng(seed)
+    years = np.asarray(list(years))
+
+    counts = year_counts(rng, len(years), n_rows)
+    n = int(counts.sum())
+    year = np.repeat(years, counts)
+    growth = year - years[0]
+    dates = random_dates(rng, years, counts)
+
+    df = pd.DataFrame({
+        'date': dates,
+        'year': year,
+        'month': dates.astype('datetime64[M]').astype(np.int64) % 12 + 1,
+        'country': random_categorical(rng, sorted(countries), n),
+        'attack_type': random_categorical(rng, sorted(attack_types), n),
+        'sector': random_categorical(rng, sorted(sectors), n),
+        'severity': random_categorical(rng, severity_levels, n, p=SEVERITY_P),
+        'financial_impact': rng.exponential(50000, size=n) * (1 + growth * 0.1),
+        'affected_users': rng.exponential(1000, size=n) * (1 + growth * 0.2),
+    })
+    return apply_schema(df, countries, attack_types, sectors, severity_levels)
@@ -0,0 +1,110 @@
+"""Choropleth map of incidents per country.
+
+The country shapes are a bundled GeoJSON (Natural Earth 1:110m admin-0
+countries, public domain, simplified to about 0.15 degrees and rounded to
+0.01 degrees), read once per process.  The folium map around it is rendered
+to HTML once as well, with the bundled Leaflet script and stylesheet inlined
+instead of folium's CDN links, so the map needs no network; a filter change
+only recomputes the per-country colors and tooltips from the cube and splices
+that small JSON payload into the cached page, where a script restyles the
+country layer.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+GEOJSON_PATH = Path(__file__).resolve().parent / 'data' / 'countries.geojson'
+# Leaflet 1.9.3 (BSD-2-Clause), the version folium links to
+LEAFLET_DIR = Path(__file__).resolve().parent / 'data' / 'leaflet'
+
+COLOR_SCALE = ('#ffffb2', '#fecc5c', '#fd8d3c', '#f03b20', '#bd0026')
+NO_DATA_COLOR = '#d9d9d9'
+
+VALUES_PLACEHOLDER = '"__CYBERDASH_COUNTRY_VALUES__"'
+
+RESTYLE_JS = """
+(function () {
+    var values = %(values)s;
+    %(layer)s.eachLayer(function (layer) {
+        var value = values[layer.feature.properties.name];
+        layer.setStyle({
+            fillColor: value ? value.color : '%(no_data)s',
+            fillOpacity: value ? 0.85 : 0.35,
+            color: '#555555',
+            weight: 0.6
+        });
+        if (value) {
+            layer.bindTooltip(value.tooltip);
+        }
+    });
+})();
+"""
+
+
+@lru_cache(maxsize=None)
+def load_countries(path=GEOJSON_PATH):
+    """Country shapes as parsed GeoJSON (read once per process)"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def leaflet_assets(path=LEAFLET_DIR):
+    """Inline ``<style>`` and ``<script>`` tags of the bundled Leaflet"""
+    css = (path / 'leaflet.css').read_text(encoding='utf-8')
+    js = (path / 'leaflet.js').read_text(encoding='utf-8')
+    return f'<style>{css}</style>\n<script>{js}</script>\n'
+
+
+@lru_cache(maxsize=None)
+def base_map_html(path=GEOJSON_PATH):
+    """Map page with the country layer and the restyling script, values left as a placeholder"""
+    import folium
+    from branca.element import MacroElement
+    from jinja2 import Template
+
+    fmap = folium.Map(location=[30, 10], zoom_start=2, tiles=None, min_zoom=1, world_copy_jump=True)
+    # No CDN links; Leaflet is inlined below and the other defaults (jQuery,
+    # Bootstrap, marker icons) are not used by a GeoJSON layer
+    fmap.default_js, fmap.default_css = [], []
+    layer = folium.GeoJson(
+        load_countries(path),
+        name='countries',
+        style_function=lambda feature: {'fillColor': NO_DATA_COLOR, 'fillOpacity': 0.35,
+                                        'color': '#555555', 'weight': 0.6},
+    ).add_to(fmap)
+    # Added after the layer, so the script runs once the shapes are on the map
+    restyle = MacroElement()
+    restyle._template = Template('{% macro script(this, kwargs) %}' + RESTYLE_JS % {
+        'values': VALUES_PLACEHOLDER, 'layer': layer.get_name(), 'no_data': NO_DATA_COLOR
+    } + '{% endmacro %}')
+    fmap.add_child(restyle)
+    return fmap.get_root().render().replace('<head>', '<head>\n' + leaflet_assets(), 1)
+
+
+def color_for(value, lo, hi, scale=COLOR_SCALE):
+    """Color of ``value`` on a stepped scale between ``lo`` and ``hi``"""
+    if hi <= lo:
+        return scale[-1]
+    step = int((value - lo) / (hi - lo) * len(scale))
+    return scale[min(max(step, 0), len(scale) - 1)]
+
+
+def country_values(values, label=str, value_format='{:,.0f}', title=''):
+    """Per-country colors and tooltips for a ``{country: value}`` mapping"""
+    values = {country: float(value) for country, value in values.items() if value == value}
+    if not values:
+        return {}
+    lo, hi = min(values.values()), max(values.values())
+    return {
+        country: {
+            'color': color_for(value, lo, hi),
+            'tooltip': f'{label(country)}: {value_format.format(value)}' + (f' ({title})' if title else ''),
+        }
+        for country, value in values.items()
+    }
+
+
+def choropleth_html(values, **kwargs):
+    """Map page colored by ``values`` (``{country: value}``; see ``country_values``)"""
+    payload = json.dumps(country_values(values, **kwargs), ensure_ascii=False)
+    return base_map_html().replace(VALUES_PLACEHOLDER, payload)
@@ -0,0 +1,64 @@
+"""Display labels for the dashboards' locales.
+
+The incident data always carries the canonical English labels from
+``cyberdash.schema``; a page translates them only when it renders (filter
+options, chart data, the visible table page, exports), so every locale shares
+one dataset and one aggregate cache.
+"""
+import pandas as pd
+
+from cyberdash.schema import CATEGORICAL_COLUMNS
+
+KO = {
+    # Countries
+    'USA': '미국', 'China': '중국', 'Russia': '러시아', 'Germany': '독일', 'UK': '영국',
+    'India': '인도', 'Brazil': '브라질', 'Japan': '일본', 'France': '프랑스', 'South Korea': '한국',
+    'Australia': '호주', 'Canada': '캐나다', 'Netherlands': '네덜란드', 'Israel': '이스라엘',
+    'Iran': '이란', 'North Korea': '북한', 'Ukraine': '우크라이나', 'Turkey': '터키',
+    # Attack types
+    'Malware': '악성코드', 'Phishing': '피싱', 'Ransomware': '랜섬웨어', 'DDoS': 'DDoS',
+    'Data Breach': '데이터 유출', 'Social Engineering': '사회공학', 'SQL Injection': 'SQL 인젝션',
+    'Zero-day Exploit': '제로데이 익스플로잇', 'Insider Threat': '내부자 위협', 'APT': 'APT',
+    # Sectors
+    'Finance': '금융', 'Healthcare': '의료', 'Government': '정부', 'Education': '교육',
+    'Technology': '기술', 'Energy': '에너지', 'Retail': '소매', 'Manufacturing': '제조',
+    'Transportation': '교통', 'Telecommunications': '통신',
+    # Severity levels
+    'Low': '낮음', 'Medium': '보통', 'High': '높음', 'Critical': '치명적',
+}
+
+LOCALES = {'en': {}, 'ko': KO}
+
+
+class Translator:
+    """Canonical data labels -> display labels for one locale"""
+
+    def __init__(self, locale='en'):
+        self.locale = locale
+        self.labels = LOCALES[locale]
+
+    def __call__(self, value):
+        return self.labels.get(value, value)
+
+    def sorted(self, values):
+        """``values`` in the alphabetical order of their display labels"""
+        return sorted(values, key=self)
+
+    def frame(self, df, columns=CATEGORICAL_COLUMNS):
+        """``df`` with the labels of ``columns`` translated, in its columns and index levels"""
+        if not self.labels:
+            return df
+        df = df.copy(deep=False)
+        for column in df.columns.intersection(columns):
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                df[column] = values.cat.rename_categories(self)
+            else:
+                df[column] = values.map(self)
+        for level, name in enumerate(df.index.names):
+            if name in columns:
+                df.index = df.index.set_levels(df.index.levels[level].map(self), level=level) \
+                    if isinstance(df.index, pd.MultiIndex) else df.index.map(self)
+        if df.columns.name in columns:
+            df.columns = df.columns.map(self)
+        return df
@@ -0,0 +1,64 @@
+"""Per-page import-time report.
+
+Each page's top-level ``import`` statements are replayed in a fresh
+interpreter under ``python -X importtime``.  Streamlit is imported first and
+left out of the total, since the server has already loaded it before any page
+runs; what remains is what a cold process pays the first time the page opens.
+"""
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def app_pages(root=ROOT):
+    """Page scripts of the app: root scripts, ``pages/`` and ``project/``"""
+    return sorted(root.glob('*.py')) + sorted((root / 'pages').glob('*.py')) + sorted((root / 'project').glob('*.py'))
+
+
+def page_imports(path):
+    """Source of the module-level import statements of a page script"""
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    return '\n'.join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def parse_importtime(stderr, after='streamlit'):
+    """Cumulative microseconds per top-level module imported after ``after``"""
+    modules = {}
+    seen = after is None
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            continue
+        name = name.strip()
+        if not seen:
+            seen = name == after
+            continue
+        modules[name] = int(cumulative)
+    return modules
+
+
+def measure_page(path, root=ROOT):
+    """Cumulative import microseconds per top-level module for one page"""
+    code = f'import sys\nsys.path.insert(0, {str(root)!r})\nimport streamlit\n{page_imports(path)}\n'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'{path}: {result.stderr.strip().splitlines()[-1]}')
+    return parse_importtime(result.stderr)
+
+
+def import_report(pages=None, repeat=3):
+    """``{page: (total_ms, {module: ms})}``, keeping the fastest of ``repeat`` runs"""
+    report = {}
+    for page in pages or app_pages():
+        runs = [measure_page(page) for _ in range(repeat)]
+        best = min(runs, key=lambda modules: sum(modules.values()))
+        report[str(page)] = (sum(best.values()) / 1000, {name: us / 1000 for name, us in best.items()})
+    return report
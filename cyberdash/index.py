@@ -0,0 +1,91 @@
+"""Bitmap index for the sidebar filters.
+
+One packed bitset (``n_rows / 8`` bytes) is precomputed per distinct value of
+each filter dimension.  A selection is answered by OR-ing the bitsets of the
+chosen values within a dimension and AND-ing across dimensions, so the string
+columns are never touched after the index is built.
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ('year', 'country', 'attack_type', 'severity')
+
+
+def column_codes(column):
+    """Integer codes and the matching values for a categorical or plain column"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), list(column.cat.categories)
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes, list(uniques)
+
+
+def append_bits(packed, n_rows, bits):
+    """Packed bitset of ``n_rows`` rows (``None``: all clear) followed by the booleans ``bits``"""
+    if packed is None:
+        packed = np.zeros((n_rows + 7) // 8, dtype=np.uint8)
+    tail = n_rows % 8
+    if tail == 0:
+        return np.concatenate([packed, np.packbits(bits)])
+    head = np.unpackbits(packed[-1:], count=tail).astype(bool)
+    return np.concatenate([packed[:-1], np.packbits(np.concatenate([head, bits]))])
+
+
+class BitmapIndex:
+    """Packed per-value bitsets over the filter dimensions of an incident frame"""
+
+    def __init__(self, df, dimensions=DIMENSIONS):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for dim in dimensions:
+            codes, values = column_codes(df[dim])
+            self.bitmaps[dim] = {value: np.packbits(codes == code) for code, value in enumerate(values)}
+
+    def append(self, batch):
+        """Index over these rows followed by ``batch``; the bitsets are extended, not rebuilt"""
+        index = BitmapIndex.__new__(BitmapIndex)
+        index.n_rows = self.n_rows + len(batch)
+        index.bitmaps = {}
+        for dim, bitmaps in self.bitmaps.items():
+            values = batch[dim].to_numpy()
+            new_values = [getattr(value, 'item', lambda: value)() for value in pd.unique(values)
+                          if value not in bitmaps and value == value]
+            index.bitmaps[dim] = {
+                value: append_bits(bitmaps.get(value), self.n_rows, values == value)
+                for value in [*bitmaps, *new_values]
+            }
+        return index
+
+    def values(self, dim):
+        """Distinct values of a dimension, in index order"""
+        return list(self.bitmaps[dim])
+
+    def _union(self, dim, selected):
+        bitmaps = self.bitmaps[dim]
+        hits = [bitmaps[value] for value in selected if value in bitmaps]
+        if not hits:
+            return None
+        out = hits[0].copy()
+        for bits in hits[1:]:
+            np.bitwise_or(out, bits, out=out)
+        return out
+
+    def mask(self, **selection):
+        """Packed bitset of rows matching the selection (``dim=values``; ``None`` means no filter)"""
+        result = None
+        for dim, selected in selection.items():
+            if selected is None:
+                continue
+            selected = set(selected)
+            if selected.issuperset(self.bitmaps[dim]):
+                continue
+            bits = self._union(dim, selected)
+            if bits is None:
+                return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            result = bits if result is None else np.bitwise_and(result, bits, out=result)
+        if result is None:
+            return np.packbits(np.ones(self.n_rows, dtype=bool))
+        return result
+
+    def positions(self, **selection):
+        """Row positions (for ``df.iloc``) matching the selection"""
+        return np.flatnonzero(np.unpackbits(self.mask(**selection), count=self.n_rows))
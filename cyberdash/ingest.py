@@ -0,0 +1,119 @@
+"""Incident data loading from CSV, Parquet or Arrow IPC files.
+
+Sources are opened as ``pyarrow.dataset`` datasets, so a directory of files
+works the same as a single file, column projection and the year/country
+filters are pushed down into the scan, and a hive-partitioned directory
+(``year=2024/part-0.parquet``) is pruned to the selected years before any
+file is opened.  Loaders are looked up by format name in ``LOADERS``; use
+``register_loader`` to plug in another source.
+"""
+from pathlib import Path
+
+from cyberdash.schema import COLUMNS, SEVERITY_LEVELS, apply_schema
+
+SUFFIX_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'ipc',
+    '.feather': 'ipc',
+    '.ipc': 'ipc',
+}
+
+
+def detect_format(source):
+    """Guess the file format from the source (or its first file's) suffix"""
+    path = Path(source)
+    if path.is_dir():
+        path = next((p for p in sorted(path.rglob('*')) if p.suffix in SUFFIX_FORMATS), path)
+    try:
+        return SUFFIX_FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Cannot tell the format of {source!r}; pass format='csv', 'parquet' or 'ipc'")
+
+
+def open_dataset(source, format=None):
+    """Open a file or directory as a pyarrow dataset with hive partition discovery"""
+    import pyarrow.dataset as ds
+
+    return ds.dataset(source, format=format or detect_format(source), partitioning='hive')
+
+
+def incident_filter(years=None, countries=None):
+    """Dataset filter expression for the year/country selection (``None`` = no filter)"""
+    import pyarrow.dataset as ds
+
+    expr = None
+    for column, values in (('year', years), ('country', countries)):
+        if values is None:
+            continue
+        term = ds.field(column).isin(list(values))
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def read_dataset(source, columns=None, filter=None, format=None):
+    """Default loader: scan a pyarrow dataset into an Arrow table"""
+    dataset = open_dataset(source, format)
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+LOADERS = {
+    'csv': read_dataset,
+    'parquet': read_dataset,
+    'ipc': read_dataset,
+}
+
+
+def register_loader(format, loader):
+    """Register ``loader(source, columns=, filter=, format=) -> pyarrow.Table`` for a format"""
+    LOADERS[format] = loader
+
+
+def available_years(source, format=None):
+    """Years present in a source, read from partition paths when the data is partitioned"""
+    import pyarrow.dataset as ds
+
+    dataset = open_dataset(source, format)
+    years = set()
+    for fragment in dataset.get_fragments():
+        year = ds.get_partition_keys(fragment.partition_expression).get('year')
+        if year is None:
+            years = None
+            break
+        years.add(int(year))
+    if years is None:
+        years = set(dataset.to_table(columns=['year']).column('year').unique().to_pylist())
+    return sorted(years)
+
+
+def load_incidents(source, columns=None, years=None, countries=None, format=None,
+                   severity_levels=SEVERITY_LEVELS):
+    """Load incident data from disk into the same frame ``load_sample_data()`` produces
+
+    ``columns`` projects the scan; ``years`` and ``countries`` are pushed down
+    as a filter, so unselected year partitions are never read.
+    """
+    format = format or detect_format(source)
+    loader = LOADERS[format]
+    table = loader(source, columns=columns, filter=incident_filter(years, countries), format=format)
+
+    df = table.to_pandas()
+    df = df[[col for col in COLUMNS if col in df.columns]]
+    return apply_schema(df, severity_levels=severity_levels).reset_index(drop=True)
+
+
+def write_incidents(df, path, format='parquet', partition_by_year=True):
+    """Write an incident frame as a (year-partitioned) dataset for ``load_incidents``"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        table, path, format=format,
+        partitioning=['year'] if partition_by_year else None,
+        partitioning_flavor='hive' if partition_by_year else None,
+        existing_data_behavior='overwrite_or_ignore',
+    )
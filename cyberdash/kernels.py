@@ -0,0 +1,95 @@
+"""Aggregation kernels over integer category codes.
+
+A grouping by one or more columns becomes one integer key per row, the
+columns' codes combined row-major (``code_a * n_b + code_b``), and every
+count and sum is a single ``np.bincount`` over those keys; labels are only
+attached to the (few) resulting groups.  No per-row string is hashed, unlike
+``groupby``/``pd.crosstab`` on object columns.  The incident cube is built
+with these kernels; ``groupby`` and ``crosstab`` apply them to a frame of rows
+directly and return what the pandas calls return.
+"""
+import numpy as np
+import pandas as pd
+
+from cyberdash.index import column_codes
+
+
+def combine_codes(codes, shape):
+    """One key per row from per-dimension ``codes`` (row-major over ``shape``) and the mask of rows kept
+
+    Rows with a missing code (-1) in any dimension are left out.
+    """
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    keys = np.zeros(int(valid.sum()), dtype=np.int64)
+    for dim_codes, size in zip(codes, shape):
+        keys = keys * size + dim_codes[valid]
+    return keys, valid
+
+
+def bincount_sums(keys, size, weights=()):
+    """Row count and the sum of each of ``weights`` for every key below ``size``, as ``(size, 1 + len(weights))``"""
+    return np.stack([np.bincount(keys, minlength=size).astype(np.float64)]
+                    + [np.bincount(keys, weights=w, minlength=size) for w in weights], axis=-1)
+
+
+def keyed_sums(keys, size, weights=()):
+    """``(cells, sums)`` like ``bincount_sums``, over the keys present only when they are few
+
+    With far fewer rows than keys (a small batch into a large grid) ``cells``
+    lists the keys present and ``sums`` has one row each; otherwise ``cells`` is
+    ``slice(None)`` and ``sums`` covers all ``size`` keys.
+    """
+    if len(keys) * 8 < size:
+        cells, rows = np.unique(keys, return_inverse=True)
+        return cells, bincount_sums(rows, len(cells), weights)
+    return slice(None), bincount_sums(keys, size, weights)
+
+
+def group_codes(df, dims):
+    """Row keys, kept-row mask, labels per dimension and grid shape for grouping ``df`` by ``dims``"""
+    codes, labels = zip(*(column_codes(df[dim]) for dim in dims))
+    shape = tuple(len(dim_labels) for dim_labels in labels)
+    keys, valid = combine_codes(codes, shape)
+    return keys, valid, labels, shape
+
+
+def groupby(df, dims, sum=(), mean=()):
+    """``count``, ``<col>_sum`` and ``<col>_mean`` per non-empty group, like ``groupby(observed=True)``
+
+    Groups are in label order, the index is the group labels (a MultiIndex for
+    more than one dimension).
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    columns = list(dict.fromkeys(list(sum) + list(mean)))
+    keys, valid, labels, shape = group_codes(df, dims)
+    weights = [df[col].to_numpy(dtype=np.float64)[valid] for col in columns]
+    sums = bincount_sums(keys, int(np.prod(shape)), weights)
+
+    present = sums[:, 0] > 0
+    index = pd.MultiIndex.from_product(labels, names=dims)[present]
+    if len(dims) == 1:
+        index = index.get_level_values(0)
+    frame = pd.DataFrame({'count': sums[present, 0].astype(np.int64)}, index=index)
+    for i, col in enumerate(columns, start=1):
+        if col in sum:
+            frame[f'{col}_sum'] = sums[present, i]
+        if col in mean:
+            frame[f'{col}_mean'] = sums[present, i] / sums[present, 0]
+    return frame
+
+
+def crosstab(df, row, column):
+    """Row counts as a ``row`` x ``column`` table of the labels present, like ``pd.crosstab``"""
+    keys, _, (row_labels, column_labels), shape = group_codes(df, [row, column])
+    table = np.bincount(keys, minlength=int(np.prod(shape))).reshape(shape)
+    return label_table(table, row_labels, column_labels, row, column)
+
+
+def label_table(table, row_labels, column_labels, row, column):
+    """2-D count grid as a labelled frame, without the rows and columns that are all zero"""
+    rows, cols = table.any(axis=1), table.any(axis=0)
+    return pd.DataFrame(
+        table[rows][:, cols],
+        index=pd.Index([label for label, keep in zip(row_labels, rows) if keep], name=row),
+        columns=pd.Index([label for label, keep in zip(column_labels, cols) if keep], name=column),
+    )
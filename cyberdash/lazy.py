@@ -0,0 +1,41 @@
+"""Deferred imports for heavy optional modules.
+
+``px = lazy_import('plotly.express')`` binds a stand-in that imports the real
+module on first attribute access, so a rerun that is served entirely from the
+chart cache never pays for importing plotly.express.  ``importlib`` takes the
+per-module import lock, so concurrent sessions touching the stand-in at once
+import the module exactly once.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name):
+    """The module if it is already imported, otherwise a ``LazyModule`` for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,252 @@
+"""Live incident feed.
+
+New incidents arrive as newline-delimited JSON, one object per incident with
+the columns of ``cyberdash.schema.COLUMNS`` (``year``/``month`` may be left out
+and are then taken from ``date``), either appended to a local file that is
+tailed or written to a Unix socket:
+
+    CYBERDASH_LIVE_FEED=feed.ndjson        # tail a file
+    CYBERDASH_LIVE_FEED=unix:/tmp/feed.sock
+
+Each micro-batch is cast to the dataset's schema and folded into the
+dashboard engine (``DashboardEngine.append``): the frame grows, the filter
+index and cube are extended in place of a reload.  ``python -m cyberdash feed``
+writes a synthetic feed for trying it out.
+"""
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from cyberdash.memo import LRUCache
+from cyberdash.schema import COLUMNS
+
+ENGINE_CACHE_ENTRIES = 4
+# Received batches are merged into one frame once there are this many
+COMPACT_CHUNKS = 32
+RECONNECT_SECONDS = 1.0
+
+
+class FileTail:
+    """New complete lines of an append-only file since the last read"""
+
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self.partial = b''
+        if not from_start and os.path.exists(path):
+            stat = os.stat(path)
+            self.offset, self.inode = stat.st_size, stat.st_ino
+
+    def read_lines(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # Rotated or truncated: start over on the new file
+            self.inode, self.offset, self.partial = stat.st_ino, 0, b''
+        if stat.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+        self.offset += len(data)
+        *lines, self.partial = (self.partial + data).split(b'\n')
+        return [line for line in lines if line.strip()]
+
+
+class SocketTail:
+    """Lines read from a Unix stream socket by a background thread (reconnecting)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lines = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='cyberdash-live-feed', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.path)
+                    with sock.makefile('rb') as stream:
+                        for line in stream:
+                            if line.strip():
+                                self.lines.put(line.rstrip(b'\n'))
+            except OSError:
+                pass
+            time.sleep(RECONNECT_SECONDS)
+
+    def read_lines(self):
+        lines = []
+        while True:
+            try:
+                lines.append(self.lines.get_nowait())
+            except queue.Empty:
+                return lines
+
+
+def open_feed(spec):
+    """Reader for a CYBERDASH_LIVE_FEED value"""
+    if spec.startswith('unix:'):
+        return SocketTail(spec[len('unix:'):])
+    return FileTail(spec)
+
+
+def parse_incidents(lines, dtypes):
+    """Micro-batch frame from NDJSON ``lines``, cast to ``dtypes``; returns ``(batch, rejected)``
+
+    Lines that are not JSON objects, lack a column, or carry a label outside the
+    dataset's categories are rejected rather than widening the schema.
+    """
+    records = []
+    rejected = 0
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            rejected += 1
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+        else:
+            rejected += 1
+    batch = pd.DataFrame.from_records(records)
+    if batch.empty:
+        return batch, rejected
+    if 'date' in batch:
+        dates = pd.to_datetime(batch['date'], errors='coerce')
+        batch['date'] = dates
+        if 'year' not in batch:
+            batch['year'] = dates.dt.year
+        if 'month' not in batch:
+            batch['month'] = dates.dt.month
+    missing = [col for col in COLUMNS if col not in batch]
+    if missing:
+        return batch.iloc[:0], rejected + len(batch)
+    batch = batch[COLUMNS].copy()
+    for col in ('year', 'month', 'financial_impact', 'affected_users'):
+        batch[col] = pd.to_numeric(batch[col], errors='coerce')
+    complete = batch.notna().all(axis=1).to_numpy()
+    batch = batch[complete].astype({col: dtypes[col] for col in COLUMNS})
+    # Labels outside the categories became NaN in the cast
+    known = batch.notna().all(axis=1).to_numpy()
+    rejected += int((~complete).sum() + (~known).sum())
+    return batch[known].reset_index(drop=True), rejected
+
+
+class LiveIngest:
+    """Reads the feed and folds its micro-batches into each base engine once per process"""
+
+    def __init__(self, feed):
+        self.feed = feed
+        # Received rows in a few frames, and the row count of every batch
+        self.chunks = []
+        self.batch_sizes = []
+        self.years = set()
+        self.received = 0
+        self.rejected = 0
+        self.updated = None
+        self._lock = threading.Lock()
+        self._engines = LRUCache(max_entries=ENGINE_CACHE_ENTRIES, sizeof=lambda entry: 0)
+
+    def poll(self, dtypes):
+        """Read what the feed has and keep it as one new batch; returns its row count"""
+        with self._lock:
+            batch, rejected = parse_incidents(self.feed.read_lines(), dtypes)
+            self.rejected += rejected
+            if len(batch):
+                self.chunks.append(batch)
+                self.batch_sizes.append(len(batch))
+                if len(self.chunks) > COMPACT_CHUNKS:
+                    self.chunks = [pd.concat(self.chunks, ignore_index=True)]
+                self.years.update(int(year) for year in batch['year'].unique())
+                self.received += len(batch)
+                self.updated = time.time()
+            return len(batch)
+
+    def rows_since(self, offset):
+        """Received rows from the ``offset``-th on, as one frame"""
+        parts, start = [], 0
+        for chunk in self.chunks:
+            if start + len(chunk) > offset:
+                parts.append(chunk.iloc[max(0, offset - start):])
+            start += len(chunk)
+        return pd.concat(parts, ignore_index=True)
+
+    def engine(self, base):
+        """``base`` with every batch received so far appended (the fold is shared by all sessions)
+
+        Whatever arrived since the last fold is appended in one step, so a new
+        base engine (a reload, another year selection) catches up with a single
+        copy of its frame however many batches it missed.
+        """
+        self.poll(base.df.dtypes.to_dict())
+        entry = self._engines.get_or_compute(base.data_key, lambda: {'engine': base, 'batches': 0, 'rows': 0})
+        with self._lock:
+            sizes = self.batch_sizes[entry['batches']:]
+            if sizes:
+                entry['engine'] = entry['engine'].append(self.rows_since(entry['rows']), sizes)
+                entry['batches'] += len(sizes)
+                entry['rows'] += sum(sizes)
+            return entry['engine']
+
+    def status(self):
+        return {'received': self.received, 'rejected': self.rejected, 'batches': len(self.batch_sizes),
+                'updated': self.updated}
+
+
+def synthetic_lines(n, rng, year):
+    """``n`` NDJSON incident lines drawn like the sample data, dated within ``year``"""
+    from cyberdash.generator import generate_incidents
+
+    batch = generate_incidents(n, seed=int(rng.integers(2**31)), years=[year])
+    lines = []
+    for record in batch.drop(columns=['year', 'month']).to_dict('records'):
+        record['date'] = pd.Timestamp(record['date']).date().isoformat()
+        record['financial_impact'] = round(float(record['financial_impact']), 2)
+        record['affected_users'] = round(float(record['affected_users']))
+        lines.append(json.dumps(record))
+    return lines
+
+
+def write_feed(target, year, rate=5.0, batch=5, seed=0):
+    """Append synthetic incidents to an NDJSON file, or serve them on a Unix socket, forever"""
+    rng = np.random.default_rng(seed)
+    if not target.startswith('unix:'):
+        while True:
+            with open(target, 'a', encoding='utf-8') as f:
+                f.write(''.join(line + '\n' for line in synthetic_lines(batch, rng, year)))
+            time.sleep(batch / rate)
+
+    path = target[len('unix:'):]
+    if os.path.exists(path):
+        os.unlink(path)
+    clients = []
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    server.settimeout(batch / rate)
+    try:
+        while True:
+            try:
+                clients.append(server.accept()[0])
+            except socket.timeout:
+                pass
+            data = ''.join(line + '\n' for line in synthetic_lines(batch, rng, year)).encode('utf-8')
+            for client in list(clients):
+                try:
+                    client.sendall(data)
+                except OSError:
+                    clients.remove(client)
+                    client.close()
+    finally:
+        server.close()
+        os.unlink(path)
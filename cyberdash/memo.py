@@ -0,0 +1,163 @@
+"""Process-wide memoization of chart aggregates and figures per filter state.
+
+Users flip between a handful of sidebar states, so the aggregates and the
+serialized Plotly figure JSON for each (page, dataset version, selection) are
+kept in one LRU cache shared by every session in the server process.  The
+cache is bounded both by entry count and by approximate size in bytes, and
+concurrent misses on the same key wait for a single computation.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from cyberdash.config import CHART_CACHE_ENTRIES, CHART_CACHE_MB
+
+
+def selection_key(**selection):
+    """Order-independent, hashable key for a sidebar selection"""
+    return tuple(
+        (dim, None if values is None else tuple(sorted(values, key=str)))
+        for dim, values in sorted(selection.items())
+    )
+
+
+def sizeof(value):
+    """Approximate memory held by a cached value in bytes"""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and total bytes
+
+    ``sizeof`` measures a value for the byte bound and ``on_evict`` is called
+    with every value that leaves the cache (eviction, ``discard``, ``clear``).
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 2**20, sizeof=sizeof, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get_or_compute(self, key, compute):
+        """Cached value for ``key``, computing it once on a miss"""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    self._pending[key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            value = compute()
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+
+    def _store(self, key, value):
+        size = self.sizeof(value)
+        evicted = []
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (old, old_size) = self._entries.popitem(last=False)
+                self.bytes -= old_size
+                self.evictions += 1
+                evicted.append(old)
+        self._evicted(evicted)
+
+    def _evicted(self, values):
+        if self.on_evict is not None:
+            for value in values:
+                self.on_evict(value)
+
+    def discard(self, key):
+        """Drop ``key`` if it is cached"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+        self._evicted([entry[0]] if entry is not None else [])
+
+    def clear(self):
+        with self._lock:
+            values = [value for value, _ in self._entries.values()]
+            self._entries.clear()
+            self.bytes = 0
+        self._evicted(values)
+
+    def stats(self):
+        """Counters for monitoring: hits, misses, hit rate, evictions, entries, bytes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+            }
+
+
+CHART_CACHE = LRUCache(max_entries=CHART_CACHE_ENTRIES, max_bytes=CHART_CACHE_MB * 2**20)
+
+
+class ChartMemo:
+    """The shared cache seen from one dataset version and filter state
+
+    Aggregates are shared by every page; figures carry page-specific titles
+    and labels, so they are kept per ``scope`` (the page).
+    """
+
+    def __init__(self, *prefix, scope=None, cache=CHART_CACHE):
+        self.prefix = prefix
+        self.scope = scope
+        self.cache = cache
+
+    def value(self, name, compute):
+        """Memoized aggregate ``compute()``"""
+        return self.cache.get_or_compute(self.prefix + (name,), compute)
+
+    def figure(self, name, build):
+        """Memoized Plotly figure of this scope; ``build()`` runs only on a miss and is stored as JSON"""
+        import plotly.io as pio
+
+        key = self.prefix + ('figure', self.scope, name)
+        return pio.from_json(self.cache.get_or_compute(key, lambda: build().to_json()))
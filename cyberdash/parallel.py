@@ -0,0 +1,172 @@
+"""Sharded cube build on a long-lived process pool.
+
+For datasets of tens of millions of rows the cube build, one pass of
+bincounts over every row, is the step whose cost grows with the data; the
+charts are rollups of the cube and only depend on its number of cells.  With
+``CYBERDASH_WORKERS`` set, large builds are sharded along the cube's first
+axis (the year): the row codes and measures are copied into shared memory,
+grouped by year with a stable sort, and each worker bincounts the rows of a
+run of years into its own slab of the cube, also in shared memory.  Every
+cell is summed by one worker over the same rows in the same order as in the
+single-threaded build, so the merged cube is bit-identical to it.
+
+The pool is started on first use (or by the server warm-up) and reused by
+every later build, including reloads of the data.
+"""
+import atexit
+import multiprocessing
+import multiprocessing.context
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory, spawn
+
+import numpy as np
+
+from cyberdash.config import PARALLEL_MIN_ROWS, WORKERS
+from cyberdash.kernels import bincount_sums, combine_codes
+
+
+def _preparation_data(name):
+    """What a spawned child is told about this process, less ``__main__``
+
+    Streamlit installs the running page as ``__main__``, which a spawned
+    worker would import (i.e. run the page); the workers only need the
+    importable modules their tasks come from.
+    """
+    data = spawn.get_preparation_data(name)
+    data.pop('init_main_from_name', None)
+    data.pop('init_main_from_path', None)
+    return data
+
+
+def _without_main(method):
+    """``method`` of a multiprocessing ``Popen`` class, sending ``_preparation_data`` to the child"""
+    spawn_module = types.SimpleNamespace(**{**vars(spawn), 'get_preparation_data': _preparation_data})
+    return types.FunctionType(method.__code__, {**method.__globals__, 'spawn': spawn_module},
+                              method.__name__, method.__defaults__, method.__closure__)
+
+
+if sys.platform == 'win32':
+    from multiprocessing import popen_spawn_win32 as popen_spawn
+
+    class _Popen(popen_spawn.Popen):
+        __init__ = _without_main(popen_spawn.Popen.__init__)
+else:
+    from multiprocessing import popen_spawn_posix as popen_spawn
+
+    class _Popen(popen_spawn.Popen):
+        _launch = _without_main(popen_spawn.Popen._launch)
+
+
+class _Process(multiprocessing.context.SpawnProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _Popen(process_obj)
+
+
+class WorkerContext(multiprocessing.context.SpawnContext):
+    """Spawn start method whose children do not import the parent's ``__main__``"""
+    Process = _Process
+
+
+@lru_cache(maxsize=None)
+def pool(workers=WORKERS):
+    """Process pool shared by every build in this process, its workers started and ready"""
+    # Spawned rather than forked: the Streamlit server runs threads
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=WorkerContext())
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    # A function of this module, so each worker imports it (and numpy, pandas) now
+    futures = [executor.submit(build_workers, 0) for _ in range(workers)]
+    for future in futures:
+        future.result()
+    return executor
+
+
+def build_workers(n_rows):
+    """Worker count for building a cube of ``n_rows`` rows (1: in this thread)"""
+    return WORKERS if WORKERS > 1 and n_rows >= PARALLEL_MIN_ROWS else 1
+
+
+def shard_bounds(axis_counts, shards):
+    """Split the first axis into runs ``(first, last)`` of labels holding about equal row counts"""
+    total = int(np.sum(axis_counts))
+    bounds, first, rows = [], 0, 0
+    for i, count in enumerate(axis_counts):
+        rows += int(count)
+        if rows * shards >= total * (len(bounds) + 1) or i == len(axis_counts) - 1:
+            bounds.append((first, i + 1))
+            first = i + 1
+    return bounds
+
+
+def sharded_cube_values(codes, impact, users, shape, workers=WORKERS):
+    """Cube array of count, impact sum, impact sum of squares and users sum, built by ``workers`` processes"""
+    first_axis = codes[0]
+    order = np.argsort(first_axis, kind='stable')
+    # Rows with a missing first-axis label sort first and are left out
+    order = order[int(np.count_nonzero(first_axis < 0)):]
+    axis_counts = np.bincount(first_axis[order], minlength=shape[0])
+    starts = np.concatenate(([0], np.cumsum(axis_counts)))
+    arrays = {
+        'codes': ((len(codes), len(order)), np.int32),
+        'measures': ((2, len(order)), np.float64),
+        'out': (tuple(shape) + (4,), np.float64),
+    }
+    blocks = {name: shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(size)) * np.dtype(dtype).itemsize))
+              for name, (size, dtype) in arrays.items()}
+    specs = {name: (blocks[name].name, size, np.dtype(dtype).str) for name, (size, dtype) in arrays.items()}
+    try:
+        views = {name: view(block, specs[name]) for name, block in blocks.items()}
+        for i, dim_codes in enumerate(codes):
+            views['codes'][i] = dim_codes[order]
+        views['measures'][0] = impact[order]
+        views['measures'][1] = users[order]
+        views['out'][...] = 0
+        del views
+
+        futures = [pool(workers).submit(build_slab, specs, int(starts[first]), int(starts[last]), first, last)
+                   for first, last in shard_bounds(axis_counts, workers)]
+        for future in futures:
+            future.result()
+        return view(blocks['out'], specs['out']).copy()
+    finally:
+        release(blocks.values(), unlink=True)
+
+
+def view(block, spec):
+    """Array over a shared memory block, described by ``(name, shape, dtype)``"""
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def release(blocks, unlink=False):
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # An array over it is still referenced (by a traceback); the OS
+            # frees the mapping with the process
+            pass
+        if unlink:
+            block.unlink()
+
+
+def build_slab(specs, start, stop, first, last):
+    """Worker: bincount rows ``start:stop`` (first-axis labels ``first:last``) into their slab of the cube"""
+    blocks = {name: shared_memory.SharedMemory(name=spec[0]) for name, spec in specs.items()}
+    try:
+        fill_slab(*(view(blocks[name], specs[name]) for name in ('codes', 'measures', 'out')), start, stop, first, last)
+    finally:
+        release(blocks.values())
+
+
+def fill_slab(codes, measures, out, start, stop, first, last):
+    slab_shape = (last - first,) + out.shape[1:-1]
+    rows = codes[:, start:stop]
+    keys, valid = combine_codes([rows[0] - first] + list(rows[1:]), slab_shape)
+    impact = measures[0, start:stop][valid]
+    users = measures[1, start:stop][valid]
+    sums = bincount_sums(keys, int(np.prod(slab_shape)), [impact, impact * impact, users])
+    out[first:last] = sums.reshape(out[first:last].shape)
@@ -0,0 +1,200 @@
+"""Headless rerun profiler for the app's pages.
+
+Each page is driven through ``streamlit.testing.v1.AppTest``: a first run,
+then one widget change per step (the next option of a selectbox,
+one option less in a multiselect) and a final rerun with nothing
+changed, which is what a warm cache looks like.  For every rerun the wall
+time and the chart cache hits/misses are recorded, while a sampling thread
+collects the script thread's stacks.  Samples are attributed to the page's
+top-level sections (the comment heading each block of module-level code) and
+written in the collapsed-stack format read by flamegraph.pl, speedscope and
+inferno:
+
+    python -m cyberdash profile project/team.py --out profiles/
+"""
+import ast
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from cyberdash.engine import ENGINES
+from cyberdash.memo import CHART_CACHE
+
+INTERVAL = 0.002
+MAX_STEPS = 8
+TIMEOUT = 120
+
+
+def page_sections(path):
+    """Line number -> section name, from the comment above each top-level statement"""
+    source = Path(path).read_text(encoding='utf-8')
+    lines = source.splitlines()
+    sections = {}
+    current = '(top)'
+    for node in ast.parse(source).body:
+        for lineno in range(node.lineno - 1, 0, -1):
+            text = lines[lineno - 1]
+            if text.startswith('#'):
+                current = text.lstrip('# ').strip().replace(';', ',') or current
+                break
+            if text.strip():
+                break
+        for lineno in range(node.lineno, (node.end_lineno or node.lineno) + 1):
+            sections[lineno] = current
+    return sections
+
+
+class StackSampler:
+    """Samples the stacks of whichever thread is running ``path`` as its ``<module>``"""
+
+    def __init__(self, path, interval=INTERVAL):
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(path)
+        self.interval = interval
+        self.sections = page_sections(path)
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name == '<module>' and os.path.abspath(code.co_filename) == self.path:
+                section = self.sections.get(frame.f_lineno, '(top)')
+                return ';'.join([self.name, section] + names[::-1])
+            names.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)})')
+            frame = frame.f_back
+        return None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = self._collapse(frame)
+                if stack is not None:
+                    self.stacks[stack] += 1
+
+    def __enter__(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cyberdash-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def section_ms(self):
+        """Approximate milliseconds per top-level section"""
+        totals = Counter()
+        for stack, count in self.stacks.items():
+            totals[stack.split(';')[1]] += count * self.interval * 1000
+        return dict(totals.most_common())
+
+    def folded(self):
+        """Collapsed stacks, one ``frame;frame;... count`` line each"""
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+
+def interactions(at, max_steps=MAX_STEPS):
+    """Widgets to change, as ``(description, kind, position)``, looked up afresh on each rerun"""
+    steps = []
+    for kind in ('multiselect', 'selectbox'):
+        for i, widget in enumerate(getattr(at, kind)):
+            if len(widget.options) > 1:
+                steps.append((f'{kind}[{i}] {widget.label}', kind, i))
+    return steps[:max_steps]
+
+
+def change(widget, kind):
+    """Move a widget to a different value; False if it cannot be changed"""
+    if kind == 'selectbox':
+        # select_index() sets the display string, which is only a value when
+        # format_func maps it to itself
+        option = widget.options[((widget.index or 0) + 1) % len(widget.options)]
+        try:
+            if str(widget.format_func(option)) != option:
+                return False
+        except Exception:
+            return False
+        widget.set_value(option)
+        return True
+    selected = list(widget.value)
+    if len(selected) > 1:
+        widget.set_value(selected[:-1])
+        return True
+    # Options are display strings; only add one when they are the values themselves
+    missing = [option for option in widget.options if option not in widget.values]
+    if missing and all(str(value) == label for value, label in zip(selected, widget.values)):
+        widget.set_value(selected + [type(selected[0])(missing[0]) if selected else missing[0]])
+        return True
+    return False
+
+
+def cache_counts():
+    stats = CHART_CACHE.stats()
+    return stats['hits'], stats['misses']
+
+
+def profile_page(path, interval=INTERVAL, max_steps=MAX_STEPS, timeout=TIMEOUT):
+    """Profile one page; returns ``(summary, folded_stacks)``"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(path), default_timeout=timeout)
+    reruns = []
+    sampler = StackSampler(path, interval)
+
+    def rerun(step):
+        hits, misses = cache_counts()
+        start = time.perf_counter()
+        at.run()
+        wall = time.perf_counter() - start
+        new_hits, new_misses = cache_counts()
+        lookups = (new_hits - hits) + (new_misses - misses)
+        reruns.append({
+            'step': step,
+            'wall_ms': wall * 1000,
+            'cache_hits': new_hits - hits,
+            'cache_misses': new_misses - misses,
+            'cache_hit_rate': (new_hits - hits) / lookups if lookups else None,
+            'exceptions': [e.message for e in at.exception],
+        })
+
+    with sampler:
+        rerun('first run')
+        for description, kind, i in interactions(at, max_steps):
+            widgets = getattr(at, kind)
+            if i >= len(widgets):
+                continue
+            if change(widgets[i], kind):
+                rerun(description)
+        rerun('rerun, nothing changed')
+
+    summary = {
+        'page': str(path),
+        'interval_ms': interval * 1000,
+        'reruns': reruns,
+        'sections_ms': sampler.section_ms(),
+        'chart_cache': CHART_CACHE.stats(),
+        'engines': ENGINES.stats(),
+    }
+    return summary, sampler.folded()
+
+
+def write_profile(summary, folded, out_dir):
+    """Write ``<page>.folded`` and ``<page>.json`` into ``out_dir``; returns the two paths"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(summary['page']).stem
+    folded_path = out_dir / f'{stem}.folded'
+    json_path = out_dir / f'{stem}.json'
+    folded_path.write_text(folded, encoding='utf-8')
+    json_path.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8')
+    return folded_path, json_path
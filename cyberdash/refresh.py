@@ -0,0 +1,130 @@
+"""Stale-while-revalidate holder for the loaded dataset.
+
+Requests always get the version that is already loaded.  Once it is older
+than ``CYBERDASH_REFRESH_SECONDS`` (or, for a watched holder, on any request
+that sees a new fingerprint) a background thread checks the source's
+fingerprint (file stamps, not contents) and, only if it changed, loads and
+prepares the new version (index, cube) off the request path, then swaps it
+in atomically.  Sessions holding the previous version keep using it; a
+failed reload keeps serving it as well.  A scheduler thread revalidates
+idle holders too, so the first visitor after a quiet period is not the one
+who finds the data stale.
+"""
+import threading
+import time
+import weakref
+
+from cyberdash.config import REFRESH_SECONDS
+
+HOLDERS = weakref.WeakSet()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class StaleWhileRevalidate:
+    """The latest ``load(fingerprint)`` result, reloaded in the background when ``fingerprint()`` changes
+
+    ``prepare(value)`` runs on a reloaded value before it is swapped in, so the
+    expensive part of first use happens on the background thread too.  With
+    ``watch`` the fingerprint is cheap enough (one ``stat``) to check on every
+    ``get``, which starts the reload as soon as it changes, whatever ``max_age``.
+    """
+
+    def __init__(self, load, fingerprint, max_age=REFRESH_SECONDS, prepare=None, watch=False):
+        self.load = load
+        self.fingerprint = fingerprint
+        self.prepare = prepare
+        self.max_age = max_age
+        self.watch = watch
+        self.value = None
+        self.version = None
+        self.loaded_at = None
+        self.checked_at = None
+        self.refreshing = False
+        self.error = None
+        # Fingerprint whose load failed, not retried on every watched get
+        self.failed = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        HOLDERS.add(self)
+        if max_age:
+            start_scheduler(max_age)
+
+    def get(self):
+        """Current value; only the very first call waits for a load"""
+        if self.value is None:
+            with self._load_lock:
+                if self.value is None:
+                    fingerprint = self.fingerprint()
+                    self._swap(fingerprint, self.load(fingerprint))
+        elif self.stale() or (self.watch and self.fingerprint() not in (self.version, self.failed)):
+            self.revalidate()
+        return self.value
+
+    def stale(self):
+        """Whether the source was last checked more than ``max_age`` seconds ago"""
+        return bool(self.max_age) and time.monotonic() - self.checked_at >= self.max_age
+
+    def revalidate(self, wait=False):
+        """Check the source on a background thread (``wait`` blocks until the check is done)"""
+        with self._lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        thread = threading.Thread(target=self._refresh, name='cyberdash-refresh', daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+
+    def _refresh(self):
+        fingerprint = None
+        try:
+            fingerprint = self.fingerprint()
+            if fingerprint != self.version:
+                value = self.load(fingerprint)
+                if self.prepare is not None:
+                    self.prepare(value)
+                with self._load_lock:
+                    self._swap(fingerprint, value)
+            self.error = self.failed = None
+        except Exception as exc:
+            # Keep serving the previous version; the next check tries again
+            self.error, self.failed = exc, fingerprint
+        finally:
+            self.checked_at = time.monotonic()
+            self.refreshing = False
+
+    def _swap(self, fingerprint, value):
+        self.value, self.version = value, fingerprint
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+
+
+def start_scheduler(interval):
+    """Start (once) the thread revalidating stale holders every ``interval`` seconds"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            return _scheduler
+        _scheduler = threading.Thread(target=_schedule, args=(interval,), name='cyberdash-refresh-scheduler',
+                                      daemon=True)
+        _scheduler.start()
+        return _scheduler
+
+
+def _schedule(interval):
+    while True:
+        time.sleep(interval)
+        for holder in list(HOLDERS):
+            if holder.value is not None and holder.stale():
+                holder.revalidate()
+
+
+def format_age(seconds, locale='en'):
+    """Rough age for the sidebar: ``'42 s'``, ``'5 min'``, ``'3 h'``, ``'2 d'``"""
+    units = {'en': ('s', 'min', 'h', 'd'), 'ko': ('초', '분', '시간', '일')}[locale]
+    sep = ' ' if locale == 'en' else ''
+    for limit, size, unit in ((60, 1, units[0]), (3600, 60, units[1]), (86400, 3600, units[2])):
+        if seconds < limit:
+            return f'{int(seconds // size)}{sep}{unit}'
+    return f'{int(seconds // 86400)}{sep}{units[3]}'
@@ -0,0 +1,83 @@
+"""Column schema for the incident DataFrame.
+
+Low-cardinality string columns are stored as pandas ``Categorical`` (int8
+codes), severity as an ordered categorical, year/month as small integers and
+the measures as float32.  Run ``python -m cyberdash memory [--rows N]`` to see
+the memory footprint before and after the schema is applied.
+"""
+import numpy as np
+import pandas as pd
+
+COUNTRIES = ['USA', 'China', 'Russia', 'Germany', 'UK', 'India', 'Brazil', 'Japan', 'France', 'South Korea',
+             'Australia', 'Canada', 'Netherlands', 'Israel', 'Iran', 'North Korea', 'Ukraine', 'Turkey']
+
+ATTACK_TYPES = ['Malware', 'Phishing', 'Ransomware', 'DDoS', 'Data Breach', 'Social Engineering',
+                'SQL Injection', 'Zero-day Exploit', 'Insider Threat', 'APT']
+
+SECTORS = ['Finance', 'Healthcare', 'Government', 'Education', 'Technology', 'Energy', 'Retail',
+           'Manufacturing', 'Transportation', 'Telecommunications']
+
+SEVERITY_LEVELS = ['Low', 'Medium', 'High', 'Critical']
+
+COLUMNS = ['date', 'year', 'month', 'country', 'attack_type', 'sector', 'severity',
+           'financial_impact', 'affected_users']
+
+CATEGORICAL_COLUMNS = ['country', 'attack_type', 'sector', 'severity']
+
+NUMERIC_DTYPES = {
+    'date': 'datetime64[s]',
+    'year': np.int16,
+    'month': np.int8,
+    'financial_impact': np.float32,
+    'affected_users': np.float32,
+}
+
+
+def incident_dtypes(countries=None, attack_types=None, sectors=None, severity_levels=SEVERITY_LEVELS):
+    """Column -> dtype mapping; nominal categories are kept in sorted order"""
+    def nominal(labels):
+        return 'category' if labels is None else pd.CategoricalDtype(sorted(labels))
+
+    return {
+        **NUMERIC_DTYPES,
+        'country': nominal(countries),
+        'attack_type': nominal(attack_types),
+        'sector': nominal(sectors),
+        'severity': pd.CategoricalDtype(severity_levels, ordered=True),
+    }
+
+
+def apply_schema(df, countries=None, attack_types=None, sectors=None, severity_levels=SEVERITY_LEVELS):
+    """Cast an incident frame to the compact schema (columns missing from ``df`` are skipped)"""
+    dtypes = incident_dtypes(countries, attack_types, sectors, severity_levels)
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+
+def legacy_frame(df):
+    """The object/int64/float64 layout the dashboards used before the schema"""
+    out = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        out[col] = out[col].astype(object)
+    out['date'] = out['date'].astype('datetime64[ns]')
+    return out.astype({'year': np.int64, 'month': np.int64,
+                       'financial_impact': np.float64, 'affected_users': np.float64})
+
+
+def memory_usage(df):
+    """Deep memory footprint of a frame in bytes"""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def memory_report(df):
+    """Memory of ``df`` in the legacy layout vs. the compact schema"""
+    before = memory_usage(legacy_frame(df))
+    after = memory_usage(apply_schema(df))
+    return {
+        'rows': len(df),
+        'before_bytes': before,
+        'after_bytes': after,
+        'bytes_per_row_before': before / max(len(df), 1),
+        'bytes_per_row_after': after / max(len(df), 1),
+        'ratio': before / max(after, 1),
+    }
+
@@ -0,0 +1,101 @@
+"""Memory-mapped Arrow IPC incident store.
+
+The dataset is materialized once as an uncompressed Arrow IPC file and every
+process memory-maps it, so several Streamlit replicas on one host share the
+OS page cache instead of each holding a private pandas copy.  A new version
+is written to a temporary file next to the store and moved into place with
+``os.replace``; readers notice the new inode on their next access and re-map,
+while sessions still holding the old table keep a valid mapping.
+"""
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+def materialize(df, path):
+    """Atomically write ``df`` as the Arrow IPC store at ``path``"""
+    import pyarrow as pa
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    fd = os.open(tmp, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    return path
+
+
+class IncidentStore:
+    """Process-wide handle on a memory-mapped store file"""
+
+    def __init__(self, path, build=None):
+        self.path = Path(path)
+        self.build = build
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._table = None
+        self._frame = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self.build is None:
+                raise
+            materialize(self.build(), self.path)
+            stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def stamp(self):
+        """``(inode, mtime_ns, size)`` of the store file; changes whenever a new version is moved in"""
+        return self._file_stamp()
+
+    def table(self):
+        """The current Arrow table, re-mapped if the file was swapped"""
+        with self._lock:
+            return self._mapped()[1]
+
+    def _mapped(self):
+        """``(stamp, table)`` of the mapped version, re-mapping a swapped file first (under ``_lock``)"""
+        import pyarrow as pa
+
+        stamp = self._file_stamp()
+        while stamp != self._stamp:
+            with pa.memory_map(str(self.path), 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            # Kept only if the file was not swapped again while it was mapped
+            mapped, stamp = stamp, self._file_stamp()
+            if stamp == mapped:
+                self._stamp, self._table = stamp, table
+        return self._stamp, self._table
+
+    def frame(self):
+        """The current version as a DataFrame; numeric columns point into the mapping"""
+        return self.snapshot()[0]
+
+    def snapshot(self):
+        """``(frame, version)`` taken from the same file version"""
+        with self._lock:
+            stamp, table = self._mapped()
+            # The frame is kept with the stamp of the table it was converted from
+            if self._frame is None or self._frame[0] != stamp:
+                self._frame = (stamp, table.to_pandas(split_blocks=True))
+            return self._frame[1], datetime.fromtimestamp(stamp[1] / 1e9)
+
+    def refresh(self, df=None):
+        """Swap in a new version (``df`` or a fresh ``build()``) without restarting readers"""
+        materialize(self.build() if df is None else df, self.path)
+        return self.frame()
+
+    @property
+    def version(self):
+        """Modification time of the mapped file, used as its version"""
+        return self.snapshot()[1]
@@ -0,0 +1,80 @@
+"""Server-side pagination for the detailed data table.
+
+Rows are addressed by their positions in the full frame (as returned by the
+filter index), which may be held as the loaded frame followed by live batches.  Sorting walks a per-column argsort of the full frame and keeps
+the filtered positions, so a new sort costs one pass over the column and
+paging afterwards only slices the kept positions; only the visible page is
+ever materialized with ``iloc`` and sent to the browser.
+"""
+import numpy as np
+
+PAGE_SIZES = (25, 50, 100, 250, 500)
+
+
+class SortIndex:
+    """Argsort of each column of an incident frame, computed on first use and kept"""
+
+    def __init__(self, df, appended=()):
+        # ``df`` and the frames of rows appended to it
+        self.frames = [df, *appended]
+        self.n_rows = sum(len(frame) for frame in self.frames)
+        self.orders = {}
+
+    def column(self, column):
+        """Sort keys of ``column`` over every row (category codes for a categorical)"""
+        keys = []
+        for frame in self.frames:
+            values = frame[column]
+            keys.append((values.cat.codes if hasattr(values, 'cat') else values).to_numpy())
+        return keys[0] if len(keys) == 1 else np.concatenate(keys)
+
+    def argsort(self, column):
+        """Row positions of the full frame in ascending order of ``column``"""
+        order = self.orders.get(column)
+        if order is None:
+            order = self._compact(np.argsort(self.column(column), kind='stable'))
+            self.orders[column] = order
+        return order
+
+    def _compact(self, order):
+        return order.astype(np.int32) if self.n_rows < 2**31 else order
+
+    def append(self, batch, frames):
+        """Sort index over ``frames``, these rows followed by ``batch``; kept argsorts are merged, not redone"""
+        index = SortIndex.__new__(SortIndex)
+        index.frames = frames
+        index.n_rows = self.n_rows + len(batch)
+        index.orders = {}
+        for column, order in self.orders.items():
+            old, new = self.frames[0][column], batch[column]
+            if hasattr(old, 'cat') and not (hasattr(new, 'cat') and old.cat.categories.equals(new.cat.categories)):
+                # Codes of other categories do not compare; sorted again on use
+                continue
+            old_keys = self.column(column)[order]
+            new_keys = (new.cat.codes if hasattr(new, 'cat') else new).to_numpy()
+            new_order = np.argsort(new_keys, kind='stable')
+            # Appended rows go after the equal rows already there, as a stable sort puts them
+            at = np.searchsorted(old_keys, new_keys[new_order], side='right')
+            index.orders[column] = index._compact(np.insert(order.astype(np.int64), at, new_order + self.n_rows))
+        return index
+
+    def sort(self, positions, column=None, ascending=True):
+        """``positions`` reordered by ``column`` (original order if ``column`` is None)"""
+        positions = np.asarray(positions)
+        if column is not None:
+            keep = np.zeros(self.n_rows, dtype=bool)
+            keep[positions] = True
+            order = self.argsort(column)
+            positions = order[keep[order]]
+        return positions if ascending else positions[::-1].copy()
+
+
+def page_count(n_rows, page_size):
+    """Number of pages needed for ``n_rows`` (at least one)"""
+    return max(1, -(-n_rows // page_size))
+
+
+def page_positions(positions, page, page_size):
+    """Positions shown on a 1-based ``page``"""
+    start = (page - 1) * page_size
+    return positions[start:start + page_size]
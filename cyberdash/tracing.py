@@ -0,0 +1,324 @@
+"""Timing spans around the dashboards' sections.
+
+A page opens one trace per rerun and marks its sections as it goes (data
+load, filters, metrics, each chart block, table, export); code inside a
+section can open nested spans.  Finished spans go to a process-wide ring
+buffer and, per finished rerun, to an optional exporter: a JSON lines file or
+an OTLP/HTTP JSON collector such as the stand-in behind
+``python -m cyberdash collector``.
+
+With ``CYBERDASH_TRACING`` unset, ``span()`` and ``start_rerun()`` return
+shared no-op objects, so instrumented code pays one attribute check.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from cyberdash.config import TRACE_BUFFER, TRACE_EXPORT, TRACING
+
+SERVICE_NAME = 'cyberdash'
+ROOT_SPAN = 'rerun'
+
+
+class Span:
+    """One timed, named operation; a context manager"""
+
+    __slots__ = ('tracer', 'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'start_ns', 'duration_ns', '_start')
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = self.span_id = self.parent_id = None
+        self.start_ns = self.duration_ns = self._start = None
+
+    def __enter__(self):
+        self.tracer._open(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.tracer._close(self)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'duration_ns': self.duration_ns,
+            'attributes': self.attributes,
+        }
+
+
+class NullSpan:
+    """Stand-in for ``Span`` and ``PageTrace`` while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def section(self, name, **attributes):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class PageTrace:
+    """The spans of one rerun of a page: a root span and consecutive sections"""
+
+    def __init__(self, tracer, page):
+        self.tracer = tracer
+        self.root = tracer.span(ROOT_SPAN, page=page).__enter__()
+        self.current = None
+
+    def section(self, name, **attributes):
+        """End the current section and start ``name``"""
+        self._end_section()
+        self.current = self.tracer.span(name, section=True, **attributes).__enter__()
+
+    def _end_section(self):
+        if self.current is not None:
+            self.current.__exit__(None, None, None)
+            self.current = None
+
+    def finish(self):
+        self._end_section()
+        self.root.__exit__(None, None, None)
+
+
+class Tracer:
+    """Span factory with a bounded buffer of finished spans"""
+
+    def __init__(self, enabled=TRACING, capacity=TRACE_BUFFER, exporter=None):
+        self.enabled = enabled
+        self.exporter = exporter
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name, **attributes):
+        """Context manager timing ``name`` as a child of the innermost open span"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attributes)
+
+    def start_rerun(self, page):
+        """Open the trace of a page rerun; call ``.section()`` per block and ``.finish()`` at the end"""
+        if not self.enabled:
+            return NULL_SPAN
+        # A rerun interrupted by st.rerun()/st.stop() never finished its spans
+        self._local.stack = []
+        self._local.finished = []
+        return PageTrace(self, page)
+
+    def _open(self, span):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.finished = []
+        parent = stack[-1] if stack else None
+        span.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        span.parent_id = parent.span_id if parent is not None else None
+        span.span_id = os.urandom(8).hex()
+        span.start_ns = time.time_ns()
+        span._start = time.perf_counter_ns()
+        stack.append(span)
+
+    def _close(self, span):
+        span.duration_ns = time.perf_counter_ns() - span._start
+        stack = self._local.stack
+        if span in stack:
+            del stack[stack.index(span):]
+        record = span.to_dict()
+        with self._lock:
+            self._spans.append(record)
+        finished = self._local.finished
+        finished.append(record)
+        if span.parent_id is None:
+            self._local.finished = []
+            if self.exporter is not None:
+                self.exporter(finished)
+
+    def spans(self):
+        """Finished spans in the buffer, oldest first"""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+def write_jsonl(spans, path):
+    """Append ``spans`` to a JSON lines file"""
+    with open(path, 'a', encoding='utf-8') as f:
+        for span in spans:
+            f.write(json.dumps(span, ensure_ascii=False) + '\n')
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_payload(spans, service=SERVICE_NAME):
+    """``spans`` as an OTLP/HTTP JSON ``ExportTraceServiceRequest``"""
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service}}]},
+        'scopeSpans': [{
+            'scope': {'name': __name__},
+            'spans': [{
+                'traceId': span['trace_id'],
+                'spanId': span['span_id'],
+                'parentSpanId': span['parent_id'] or '',
+                'name': span['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(span['start_ns']),
+                'endTimeUnixNano': str(span['start_ns'] + span['duration_ns']),
+                'attributes': [{'key': key, 'value': otlp_value(value)}
+                               for key, value in span['attributes'].items()],
+            } for span in spans],
+        }],
+    }]}
+
+
+def from_otlp(payload):
+    """Spans of an OTLP JSON payload, in the ring buffer's dict form"""
+    spans = []
+    for resource in payload.get('resourceSpans', []):
+        for scope in resource.get('scopeSpans', []):
+            for span in scope.get('spans', []):
+                start, end = int(span['startTimeUnixNano']), int(span['endTimeUnixNano'])
+                spans.append({
+                    'trace_id': span['traceId'],
+                    'span_id': span['spanId'],
+                    'parent_id': span.get('parentSpanId') or None,
+                    'name': span['name'],
+                    'start_ns': start,
+                    'duration_ns': end - start,
+                    'attributes': {a['key']: next(iter(a['value'].values())) for a in span.get('attributes', [])},
+                })
+    return spans
+
+
+def post_otlp(spans, url, timeout=2):
+    """POST ``spans`` to an OTLP/HTTP JSON endpoint"""
+    from urllib.request import Request, urlopen
+
+    body = json.dumps(otlp_payload(spans)).encode('utf-8')
+    request = Request(url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+    with urlopen(request, timeout=timeout) as response:
+        response.read()
+
+
+def exporter_for(target):
+    """Exporter callable for a CYBERDASH_TRACE_EXPORT value, or None"""
+    if not target:
+        return None
+    if target.startswith(('http://', 'https://')):
+        def export(spans):
+            # Off the script thread, so a slow or missing collector never delays a rerun
+            threading.Thread(target=_post_quietly, args=(spans, target), daemon=True).start()
+        return export
+    return lambda spans: write_jsonl(spans, target)
+
+
+def _post_quietly(spans, url):
+    try:
+        post_otlp(spans, url)
+    except OSError:
+        pass
+
+
+TRACER = Tracer(exporter=exporter_for(TRACE_EXPORT))
+span = TRACER.span
+start_rerun = TRACER.start_rerun
+
+
+def traced(name, **attributes):
+    """Decorator running a function inside ``span(name)``; the function itself while tracing is off
+
+    Meant for ``st.fragment`` functions, whose own reruns happen outside the
+    page's trace: there the span is a trace of its own.
+    """
+    def decorate(func):
+        if not TRACER.enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def slowest_sections(spans=None, last=20):
+    """Per-span-name timings over the last ``last`` reruns, slowest mean first"""
+    import pandas as pd
+
+    spans = TRACER.spans() if spans is None else spans
+    roots = [s for s in spans if s['parent_id'] is None][-last:]
+    pages = {s['trace_id']: s['attributes'].get('page') for s in roots}
+    rows = [(pages[s['trace_id']], s['name'], s['duration_ns'] / 1e6)
+            for s in spans if s['trace_id'] in pages]
+    frame = pd.DataFrame(rows, columns=['page', 'span', 'ms'])
+    if frame.empty:
+        return pd.DataFrame(columns=['page', 'span', 'reruns', 'mean_ms', 'p95_ms', 'max_ms'])
+    stats = frame.groupby(['page', 'span'], sort=False)['ms'].agg(
+        reruns='count', mean_ms='mean', p95_ms=lambda ms: ms.quantile(0.95), max_ms='max'
+    )
+    return stats.sort_values('mean_ms', ascending=False).reset_index()
+
+
+def serve_collector(port=4318, out=None, host='127.0.0.1'):
+    """Minimal OTLP/HTTP JSON collector: prints each rerun and appends spans to ``out``"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                spans = from_otlp(json.loads(self.rfile.read(length)))
+            except (ValueError, KeyError):
+                self.send_error(400, 'expected an OTLP JSON trace export')
+                return
+            if out:
+                write_jsonl(spans, out)
+            for root in (s for s in spans if s['parent_id'] is None):
+                print(f"{root['duration_ns'] / 1e6:8.1f} ms  {root['attributes'].get('page', root['name'])}  "
+                      f"({sum(s['trace_id'] == root['trace_id'] for s in spans)} spans)", flush=True)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"collecting OTLP/HTTP JSON traces on http://{host}:{port}/v1/traces", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,56 @@
+"""Server start-up warm-up.
+
+``python -m cyberdash serve`` starts a background thread that imports the
+heavy modules, starts the cube build's worker processes (``CYBERDASH_WORKERS``)
+and builds the shared dashboard engine (dataset, filter index and cube) while
+the Streamlit server boots, so the first session finds them ready in the
+process instead of paying for them inside its first rerun.
+"""
+import importlib
+import threading
+import time
+
+WARM_MODULES = (
+    'numpy',
+    'pandas',
+    'pyarrow',
+    'plotly.io',
+    'plotly.graph_objects',
+    'plotly.express',
+)
+
+
+def warm_up(modules=WARM_MODULES, data=True):
+    """Import ``modules`` and build the dashboard engine; returns seconds per step"""
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = time.perf_counter() - start
+
+    from cyberdash.config import WORKERS
+
+    if WORKERS > 1:
+        from cyberdash.parallel import pool
+
+        start = time.perf_counter()
+        pool()
+        timings['pool'] = time.perf_counter() - start
+
+    if data:
+        from cyberdash.engine import data_years, warm_engine
+
+        start = time.perf_counter()
+        warm_engine(data_years()[-3:])
+        timings['engine'] = time.perf_counter() - start
+    return timings
+
+
+def start_warm_up(**kwargs):
+    """Run ``warm_up`` on a daemon thread and return the thread"""
+    thread = threading.Thread(target=warm_up, kwargs=kwargs, name='cyberdash-warm-up', daemon=True)
+    thread.start()
+    return thread
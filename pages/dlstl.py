@@ -1,10 +1,25 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import random
+import math
+import time
+from cyberdash.config import EXPORT_MAX_MB, LIVE_FEED, LIVE_REFRESH_SECONDS, SCATTER_POINTS, TRACE_PANEL
+from cyberdash.downsample import downsample
+from cyberdash.engine import current_engine, data_status, data_years, live_ingest
+from cyberdash.export import EXPORT_FORMATS, estimate_export, export_file_name, export_too_large, format_bytes, lazy_export
+from cyberdash.forecast import HORIZON, LEVEL, TrendFit, batch_forecast
+from cyberdash.geo import choropleth_html
+from cyberdash.i18n import Translator
+from cyberdash.lazy import lazy_import
+from cyberdash.memo import ChartMemo, selection_key
+from cyberdash.refresh import format_age
+from cyberdash.table import PAGE_SIZES, page_count, page_positions
+from cyberdash.tracing import slowest_sections, span, start_rerun, traced
+
+# Plotly은 차트 캐시에 없는 차트를 처음 그릴 때만 불러오기
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+# 섹션별 시간 측정 (CYBERDASH_TRACING을 켜지 않으면 아무 일도 하지 않음)
+trace = start_rerun('dlstl')
 
 # 페이지 설정
 st.set_page_config(
@@ -39,61 +54,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 샘플 데이터 생성 (실제 데이터 로딩으로 대체)
-@st.cache_data
-def load_sample_data():
-    """샘플 사이버보안 위협 데이터 생성"""
-    np.random.seed(42)
-    
-    # 국가 및 지역
-    countries = ['미국', '중국', '러시아', '독일', '영국', '인도', '브라질', '일본', '프랑스', '한국',
-                '호주', '캐나다', '네덜란드', '이스라엘', '이란', '북한', '우크라이나', '터키']
-    
-    # 공격 유형
-    attack_types = ['악성코드', '피싱', '랜섬웨어', 'DDoS', '데이터 유출', '사회공학', 
-                   'SQL 인젝션', '제로데이 익스플로잇', '내부자 위협', 'APT']
-    
-    # 산업군
-    sectors = ['금융', '의료', '정부', '교육', '기술', '에너지', '소매', 
-              '제조', '교통', '통신']
-    
-    # 심각도 수준
-    severity_levels = ['낮음', '보통', '높음', '치명적']
-    
-    # 2015-2024년 데이터 생성
-    data = []
-    for year in range(2015, 2025):
-        # 최근 연도일수록 더 많은 사고
-        num_incidents = 800 + (year - 2015) * 150 + np.random.randint(-100, 200)
-        
-        for _ in range(num_incidents):
-            # 연도 내 무작위 날짜 생성
-            start_date = datetime(year, 1, 1)
-            end_date = datetime(year, 12, 31)
-            random_date = start_date + timedelta(days=np.random.randint(0, (end_date - start_date).days))
-            
-            data.append({
-                'date': random_date,
-                'year': year,
-                'month': random_date.month,
-                'country': np.random.choice(countries),
-                'attack_type': np.random.choice(attack_types),
-                'sector': np.random.choice(sectors),
-                'severity': np.random.choice(severity_levels, p=[0.3, 0.4, 0.2, 0.1]),
-                'financial_impact': np.random.exponential(50000) * (1 + (year - 2015) * 0.1),
-                'affected_users': np.random.exponential(1000) * (1 + (year - 2015) * 0.2)
-            })
-    
-    return pd.DataFrame(data)
-
-# 데이터 로드
-df = load_sample_data()
+# 데이터는 영어 원본 레이블 그대로 두고 화면에 그릴 때만 한국어로 변환
+tr = Translator('ko')
 
 # 사이드바
 st.sidebar.markdown("### 🔧 필터")
 
-# 연도 필터
-years = sorted(df['year'].unique())
+# 연도 필터 (선택한 연도만 읽도록 데이터 로드 전에 선택)
+years = data_years()
 selected_years = st.sidebar.multiselect(
     "연도 선택", 
     years, 
@@ -101,328 +69,569 @@ selected_years = st.sidebar.multiselect(
     help="분석할 연도를 선택하세요"
 )
 
+# 데이터 로드: 모든 페이지가 공유하는 엔진 (데이터셋, 필터 인덱스, 큐브)
+trace.section('data load')
+engine = current_engine(selected_years)
+data_key = engine.data_key
+
 # 국가 필터
-countries = sorted(df['country'].unique())
+trace.section('sidebar filters')
+countries = tr.sorted(engine.values('country'))
 selected_countries = st.sidebar.multiselect(
     "국가 선택", 
     countries, 
     default=countries[:5],
+    format_func=tr,
     help="분석할 국가를 선택하세요"
 )
 
 # 공격 유형 필터
-attack_types = sorted(df['attack_type'].unique())
+attack_types = tr.sorted(engine.values('attack_type'))
 selected_attacks = st.sidebar.multiselect(
     "공격 유형 선택", 
     attack_types, 
     default=attack_types,
+    format_func=tr,
     help="분석할 공격 유형을 선택하세요"
 )
 
 # 심각도 필터
-severity_levels = ['낮음', '보통', '높음', '치명적']
+severity_levels = engine.values('severity')
 selected_severity = st.sidebar.multiselect(
     "심각도 수준 선택", 
     severity_levels, 
     default=severity_levels,
+    format_func=tr,
     help="분석할 심각도 수준을 선택하세요"
 )
 
-# 데이터 필터링
-filtered_df = df[
-    (df['year'].isin(selected_years)) &
-    (df['country'].isin(selected_countries)) &
-    (df['attack_type'].isin(selected_attacks)) &
-    (df['severity'].isin(selected_severity))
-]
+# 데이터 버전 (새 버전은 백그라운드에서 불러와 다음 실행부터 사용)
+status = data_status(selected_years)
+st.sidebar.caption(
+    f"🗂️ 데이터 버전 {status['version']} · {format_age(time.time() - status['loaded_at'], 'ko')} 전 로드"
+    + (" · 새로고침 중…" if status['refreshing'] else "")
+)
+
+# 데이터 필터링 (비트맵 인덱스 또는 DuckDB: 필터 안에서는 OR, 필터끼리는 AND)
+trace.section('filter')
+filters = dict(
+    year=selected_years,
+    country=selected_countries,
+    attack_type=selected_attacks,
+    severity=selected_severity
+)
+positions = engine.positions(**filters)
+
+# 같은 선택으로 큐브 슬라이스 (또는 DuckDB 쿼리): 차트와 지표는 이 슬라이스를 집계해서 사용
+selection = engine.slice(**filters)
+
+# 이 필터 상태의 집계는 프로세스 안의 모든 페이지/세션이 공유, 차트는 페이지별로 캐시.
+# 데이터 키는 실시간 데이터가 이 선택에 들어올 때만 바뀌고, 시계열별 예측은 연도와 심각도에만 의존
+data_key = engine.data_key_for(positions)
+memo = ChartMemo(data_key, selection_key(**filters), scope='dlstl')
+segment_filters = dict(year=selected_years, severity=selected_severity)
+segment_memo = ChartMemo(
+    engine.data_key_for(engine.positions(**segment_filters)), selection_key(**segment_filters), scope='dlstl'
+)
+totals = memo.value('totals', selection.totals)
+severity_counts = memo.value('severity_counts', lambda: selection.rollup('severity')['count'])
 
 # 메인 대시보드
 st.markdown('<h1 class="main-header">🌐 글로벌 사이버보안 위협 대시보드</h1>', unsafe_allow_html=True)
 
+# 실시간 피드: 주기적으로 확인하고, 새 사고가 선택에 해당할 때만 페이지를 다시 실행
+# (바뀐 선택의 차트만 다시 계산)
+if LIVE_FEED:
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_status(shown_key, filters):
+        engine = current_engine(filters['year'])
+        if engine.data_key_for(engine.positions(**filters)) != shown_key:
+            st.rerun()
+        status = live_ingest().status()
+        updated = "" if status['updated'] is None else f" · 마지막 수신 {time.strftime('%H:%M:%S', time.localtime(status['updated']))}"
+        st.caption(f"🟢 실시간 피드 · 수신 {status['received']:,}건{updated}")
+
+    live_status(data_key, filters)
+
 # 주요 지표
+trace.section('kpi metrics')
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_incidents = len(filtered_df)
+    total_incidents = int(totals['count'])
     st.metric("총 사고 건수", f"{total_incidents:,}")
 
 with col2:
-    avg_financial_impact = filtered_df['financial_impact'].mean()
+    avg_financial_impact = totals['impact_mean']
     st.metric("평균 재정 피해", f"${avg_financial_impact:,.0f}")
 
 with col3:
-    total_affected_users = filtered_df['affected_users'].sum()
+    total_affected_users = totals['users_sum']
     st.metric("총 피해자 수", f"{total_affected_users:,.0f}")
 
 with col4:
-    critical_incidents = len(filtered_df[filtered_df['severity'] == '치명적'])
+    critical_incidents = int(severity_counts.get('Critical', 0))
     st.metric("치명적 사고", f"{critical_incidents:,}")
 
 st.markdown("---")
 
 # 차트 섹션
+trace.section('charts')
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span('chart/time'):
     st.subheader("📈 시간별 위협 추이")
     
     # 시계열 차트
-    time_series = filtered_df.groupby('year').size().reset_index(name='incidents')
-    fig_time = px.line(
-        time_series, 
-        x='year', 
-        y='incidents',
-        title='연도별 사이버보안 사고',
-        markers=True
-    )
-    fig_time.update_layout(
-        xaxis_title="연도",
-        yaxis_title="사고 건수",
-        hovermode='x unified'
-    )
-    st.plotly_chart(fig_time, use_container_width=True)
+    def build_time_chart():
+        time_series = selection.rollup('year')['count'].reset_index(name='incidents')
+        fig_time = px.line(
+            time_series, 
+            x='year', 
+            y='incidents',
+            title='연도별 사이버보안 사고',
+            markers=True
+        )
+        fig_time.update_layout(
+            xaxis_title="연도",
+            yaxis_title="사고 건수",
+            hovermode='x unified'
+        )
+        return fig_time
 
-with col2:
+    st.plotly_chart(memo.figure('time', build_time_chart), use_container_width=True)
+
+with col2, span('chart/attack_types'):
     st.subheader("🎯 공격 유형 분포")
     
     # 공격 유형 파이 차트
-    attack_dist = filtered_df['attack_type'].value_counts().reset_index()
-    attack_dist.columns = ['attack_type', 'count']
-    
-    fig_pie = px.pie(
-        attack_dist, 
-        values='count', 
-        names='attack_type',
-        title='공격 유형 분포'
-    )
-    st.plotly_chart(fig_pie, use_container_width=True)
+    def build_attack_chart():
+        attack_dist = selection.rollup('attack_type')['count'].sort_values(ascending=False).reset_index()
+        attack_dist.columns = ['attack_type', 'count']
+        
+        fig_pie = px.pie(
+            tr.frame(attack_dist), 
+            values='count', 
+            names='attack_type',
+            title='공격 유형 분포'
+        )
+        return fig_pie
+
+    st.plotly_chart(memo.figure('attack_types', build_attack_chart), use_container_width=True)
 
 # 지역별 분석
+trace.section('geographic')
 st.subheader("🌍 지역별 분포")
 
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span('chart/countries'):
     # 사고 건수 기준 상위 국가
-    country_stats = filtered_df.groupby('country').agg({
-        'attack_type': 'count',
-        'financial_impact': 'mean',
-        'affected_users': 'sum'
-    }).round(2)
-    country_stats.columns = ['사고 건수', '평균 재정 피해', '총 피해자 수']
-    country_stats = country_stats.sort_values('사고 건수', ascending=False)
-    
-    fig_country = px.bar(
-        country_stats.head(10).reset_index(),
-        x='country',
-        y='사고 건수',
-        title='사고 건수 기준 상위 10개국',
-        color='사고 건수',
-        color_continuous_scale='Reds'
-    )
-    fig_country.update_layout(xaxis_title="국가", yaxis_title="사고 건수")
-    st.plotly_chart(fig_country, use_container_width=True)
+    def build_country_chart():
+        country_stats = selection.rollup('country')[['count', 'impact_mean', 'users_sum']].round(2)
+        country_stats.columns = ['사고 건수', '평균 재정 피해', '총 피해자 수']
+        country_stats = country_stats.sort_values('사고 건수', ascending=False)
+        
+        fig_country = px.bar(
+            tr.frame(country_stats.head(10).reset_index()),
+            x='country',
+            y='사고 건수',
+            title='사고 건수 기준 상위 10개국',
+            color='사고 건수',
+            color_continuous_scale='Reds'
+        )
+        fig_country.update_layout(xaxis_title="국가", yaxis_title="사고 건수")
+        return fig_country
 
-with col2:
+    st.plotly_chart(memo.figure('countries', build_country_chart), use_container_width=True)
+
+with col2, span('chart/severity_by_country'):
     # 국가별 심각도 분포
-    severity_country = filtered_df.groupby(['country', 'severity']).size().reset_index(name='count')
-    
-    fig_severity = px.bar(
-        severity_country,
-        x='country',
-        y='count',
-        color='severity',
-        title='국가별 심각도 분포',
-        color_discrete_map={
-            '낮음': '#2ecc71',
-            '보통': '#f39c12',
-            '높음': '#e74c3c',
-            '치명적': '#8e44ad'
-        }
+    def build_severity_chart():
+        severity_country = selection.rollup('country', 'severity')['count'].reset_index()
+        
+        fig_severity = px.bar(
+            tr.frame(severity_country),
+            x='country',
+            y='count',
+            color='severity',
+            title='국가별 심각도 분포',
+            color_discrete_map={
+                '낮음': '#2ecc71',
+                '보통': '#f39c12',
+                '높음': '#e74c3c',
+                '치명적': '#8e44ad'
+            }
+        )
+        fig_severity.update_layout(xaxis_title="국가", yaxis_title="사고 건수")
+        return fig_severity
+
+    st.plotly_chart(memo.figure('severity_by_country', build_severity_chart), use_container_width=True)
+
+# 국가별 색상 지도 (국가 경계와 지도 페이지는 한 번만 캐시, 필터가 바뀌면 국가 색만 다시 계산).
+# 자체 위젯이 있는 섹션은 프래그먼트: 그 위젯은 해당 프래그먼트만 다시 실행하고,
+# 프래그먼트가 의존하는 필터 상태는 인자로 전달
+trace.section('map')
+
+
+@st.fragment
+@traced('fragment/map', page='dlstl')
+def choropleth_map(selection, memo):
+    map_measures = {
+        'count': ("사고 건수", '{:,.0f}'),
+        'impact_sum': ("총 재정 피해", '${:,.0f}'),
+        'impact_mean': ("평균 재정 피해", '${:,.0f}')
+    }
+    map_measure = st.radio(
+        "지도 색상 기준",
+        list(map_measures),
+        format_func=lambda m: map_measures[m][0],
+        horizontal=True
+    )
+    country_map = memo.value(
+        f'country_map_ko_{map_measure}',
+        lambda: choropleth_html(
+            selection.rollup('country')[map_measure].to_dict(),
+            label=tr,
+            value_format=map_measures[map_measure][1],
+            title=map_measures[map_measure][0]
+        )
     )
-    fig_severity.update_layout(xaxis_title="국가", yaxis_title="사고 건수")
-    st.plotly_chart(fig_severity, use_container_width=True)
+    st.iframe(country_map, height=450)
+
+
+choropleth_map(selection, memo)
 
 # 산업군 분석
+trace.section('sectors')
 st.subheader("🏢 산업군 분석")
 
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span('chart/sectors'):
     # 산업군별 사고
-    sector_stats = filtered_df.groupby('sector').agg({
-        'attack_type': 'count',
-        'financial_impact': 'mean'
-    }).round(2)
-    sector_stats.columns = ['사고 건수', '평균 재정 피해']
-    sector_stats = sector_stats.sort_values('사고 건수', ascending=True)
-    
-    fig_sector = px.bar(
-        sector_stats.reset_index(),
-        x='사고 건수',
-        y='sector',
-        title='산업군별 사고 건수',
-        orientation='h',
-        color='평균 재정 피해',
-        color_continuous_scale='Viridis'
-    )
-    st.plotly_chart(fig_sector, use_container_width=True)
+    def build_sector_chart():
+        sector_stats = selection.rollup('sector')[['count', 'impact_mean']].round(2)
+        sector_stats.columns = ['사고 건수', '평균 재정 피해']
+        sector_stats = sector_stats.sort_values('사고 건수', ascending=True)
+        
+        fig_sector = px.bar(
+            tr.frame(sector_stats.reset_index()),
+            x='사고 건수',
+            y='sector',
+            title='산업군별 사고 건수',
+            orientation='h',
+            color='평균 재정 피해',
+            color_continuous_scale='Viridis'
+        )
+        return fig_sector
 
-with col2:
+    st.plotly_chart(memo.figure('sectors', build_sector_chart), use_container_width=True)
+
+with col2, span('chart/monthly'):
     # 월별 추이
-    monthly_trend = filtered_df.groupby('month').size().reset_index(name='incidents')
-    monthly_trend['month_name'] = monthly_trend['month'].apply(
-        lambda x: ['1월', '2월', '3월', '4월', '5월', '6월',
-                  '7월', '8월', '9월', '10월', '11월', '12월'][x-1]
-    )
-    
-    fig_monthly = px.line(
-        monthly_trend,
-        x='month_name',
-        y='incidents',
-        title='월별 사고 패턴',
-        markers=True
-    )
-    fig_monthly.update_layout(xaxis_title="월", yaxis_title="사고 건수")
-    st.plotly_chart(fig_monthly, use_container_width=True)
+    def build_monthly_chart():
+        monthly_trend = selection.rollup('month')['count'].reset_index(name='incidents')
+        monthly_trend['month_name'] = monthly_trend['month'].apply(
+            lambda x: ['1월', '2월', '3월', '4월', '5월', '6월',
+                      '7월', '8월', '9월', '10월', '11월', '12월'][x-1]
+        )
+        
+        fig_monthly = px.line(
+            monthly_trend,
+            x='month_name',
+            y='incidents',
+            title='월별 사고 패턴',
+            markers=True
+        )
+        fig_monthly.update_layout(xaxis_title="월", yaxis_title="사고 건수")
+        return fig_monthly
 
-# 고급 분석
+    st.plotly_chart(memo.figure('monthly', build_monthly_chart), use_container_width=True)
+
+# 고급 분석 (프래그먼트, 열린 탭만 계산)
+trace.section('advanced')
 st.subheader("🔍 고급 분석")
 
-tab1, tab2, tab3 = st.tabs(["재정 피해", "상관관계 분석", "추세 예측"])
 
-with tab1:
-    # 재정 피해 분석
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # 공격 유형별 재정 피해
-        financial_impact = filtered_df.groupby('attack_type')['financial_impact'].agg(['mean', 'sum']).round(2)
-        financial_impact.columns = ['평균 피해', '총 피해']
-        financial_impact = financial_impact.sort_values('평균 피해', ascending=False)
-        
-        fig_financial = px.bar(
-            financial_impact.reset_index(),
-            x='attack_type',
-            y='평균 피해',
-            title='공격 유형별 평균 재정 피해',
-            color='평균 피해',
-            color_continuous_scale='Reds'
-        )
-        fig_financial.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig_financial, use_container_width=True)
-    
-    with col2:
-        # 산점도: 재정 피해 vs 피해자 수
-        fig_scatter = px.scatter(
-            filtered_df.sample(min(1000, len(filtered_df))),
-            x='affected_users',
-            y='financial_impact',
-            color='severity',
-            size='affected_users',
-            hover_data=['country', 'attack_type'],
-            title='재정 피해 vs 피해자 수',
-            color_discrete_map={
-                '낮음': '#2ecc71',
-                '보통': '#f39c12',
-                '높음': '#e74c3c',
-                '치명적': '#8e44ad'
-            }
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
+@st.fragment
+@traced('fragment/advanced', page='dlstl')
+def advanced_analysis(selection, positions, engine, memo, segment_memo, filters):
+    selected_years, selected_countries = filters['year'], filters['country']
+    selected_attacks, selected_severity = filters['attack_type'], filters['severity']
 
-with tab2:
-    # 상관관계 히트맵
-    st.write("### 공격 유형과 산업군 상관관계")
-    
-    correlation_data = pd.crosstab(filtered_df['attack_type'], filtered_df['sector'])
-    
-    fig_heatmap = px.imshow(
-        correlation_data,
-        title='공격 유형 vs 산업군 히트맵',
-        color_continuous_scale='RdYlBu_r',
-        aspect='auto'
+    # 탭 상태를 추적해서 탭을 바꾸면 이 프래그먼트만 다시 실행
+    tab1, tab2, tab3 = st.tabs(
+        ["재정 피해", "상관관계 분석", "추세 예측"],
+        key="dlstl_advanced_tab",
+        on_change="rerun"
     )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
 
-with tab3:
-    # 간단한 추세 예측
-    st.write("### 사고 추세 예측")
+    if tab1.open:
+        with tab1:
+            # 재정 피해 분석
+            col1, col2 = st.columns(2)
     
-    yearly_trend = filtered_df.groupby('year').size().reset_index(name='incidents')
+            with col1, span('chart/financial'):
+                # 공격 유형별 재정 피해
+                def build_financial_chart():
+                    financial_impact = selection.rollup('attack_type')[['impact_mean', 'impact_sum']].round(2)
+                    financial_impact.columns = ['평균 피해', '총 피해']
+                    financial_impact = financial_impact.sort_values('평균 피해', ascending=False)
+            
+                    fig_financial = px.bar(
+                        tr.frame(financial_impact.reset_index()),
+                        x='attack_type',
+                        y='평균 피해',
+                        title='공격 유형별 평균 재정 피해',
+                        color='평균 피해',
+                        color_continuous_scale='Reds'
+                    )
+                    fig_financial.update_layout(xaxis_tickangle=-45)
+                    return fig_financial
+
+                st.plotly_chart(memo.figure('financial', build_financial_chart), use_container_width=True)
     
-    # sklearn 없이 간단한 선형 회귀
-    if len(yearly_trend) > 1:
-        X = yearly_trend['year'].values
-        y = yearly_trend['incidents'].values
-        
-        # 기울기와 절편 수동 계산
-        n = len(X)
-        sum_x = np.sum(X)
-        sum_y = np.sum(y)
-        sum_xy = np.sum(X * y)
-        sum_x2 = np.sum(X * X)
-        
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
-        intercept = (sum_y - slope * sum_x) / n
-        
-        # 향후 2년 예측
-        pred_2025 = slope * 2025 + intercept
-        pred_2026 = slope * 2026 + intercept
-        predictions = [pred_2025, pred_2026]
-        
-        # 예측 차트 생성
-        fig_pred = go.Figure()
-        fig_pred.add_trace(go.Scatter(
-            x=yearly_trend['year'],
-            y=yearly_trend['incidents'],
-            mode='lines+markers',
-            name='과거 데이터',
-            line=dict(color='blue')
-        ))
-        fig_pred.add_trace(go.Scatter(
-            x=[2025, 2026],
-            y=predictions,
-            mode='lines+markers',
-            name='예측',
-            line=dict(color='red', dash='dash')
-        ))
-        fig_pred.update_layout(
-            title='사이버보안 사고 추세 예측',
-            xaxis_title='연도',
-            yaxis_title='사고 건수'
-        )
-        st.plotly_chart(fig_pred, use_container_width=True)
+            with col2, span('chart/scatter'):
+                # 산점도: 재정 피해 vs 피해자 수 (WebGL, 고정된 밀도 보존 샘플)
+                def build_scatter_chart():
+                    # 차트가 캐시에 없을 때만 행을 가져옴
+                    filtered_df = engine.rows(positions)
+                    scatter_df = filtered_df.iloc[
+                        downsample(filtered_df, 'affected_users', 'financial_impact', 'severity', max_points=SCATTER_POINTS)
+                    ]
+                    scatter_note = f' ({len(filtered_df):,}건 중 {len(scatter_df):,}건 표시)' if len(scatter_df) < len(filtered_df) else ''
+                    fig_scatter = px.scatter(
+                        tr.frame(scatter_df),
+                        x='affected_users',
+                        y='financial_impact',
+                        color='severity',
+                        hover_data=['country', 'attack_type'],
+                        title='재정 피해 vs 피해자 수' + scatter_note,
+                        render_mode='webgl',
+                        opacity=0.7,
+                        color_discrete_map={
+                            '낮음': '#2ecc71',
+                            '보통': '#f39c12',
+                            '높음': '#e74c3c',
+                            '치명적': '#8e44ad'
+                        }
+                    )
+                    return fig_scatter
+
+                st.plotly_chart(memo.figure('scatter', build_scatter_chart), use_container_width=True)
+
+    if tab2.open:
+        with tab2, span('chart/heatmap'):
+            # 상관관계 히트맵
+            st.write("### 공격 유형과 산업군 상관관계")
+    
+            def build_heatmap():
+                correlation_data = selection.crosstab('attack_type', 'sector')
         
-        st.info(f"2025년 예상 사고 건수: {int(predictions[0]):,}")
-        st.info(f"2026년 예상 사고 건수: {int(predictions[1]):,}")
-    else:
-        st.warning("추세 예측을 위한 데이터가 부족합니다. 더 많은 연도를 선택해주세요.")
-
-# 데이터 테이블
+                fig_heatmap = px.imshow(
+                    tr.frame(correlation_data),
+                    title='공격 유형 vs 산업군 히트맵',
+                    color_continuous_scale='RdYlBu_r',
+                    aspect='auto'
+                )
+                return fig_heatmap
+
+            st.plotly_chart(memo.figure('heatmap', build_heatmap), use_container_width=True)
+
+    if tab3.open:
+        with tab3, span('chart/trend'):
+            # 선형 추세 예측 (누적 합으로 닫힌 형태 적합, 필터 상태별 캐시)
+            st.write("### 사고 추세 예측")
+
+            forecast_col1, forecast_col2 = st.columns(2)
+            horizon = forecast_col1.slider("예측 기간 (년)", 1, 5, HORIZON)
+            level = forecast_col2.select_slider(
+                "예측 구간",
+                [0.8, 0.9, 0.95, 0.99],
+                value=LEVEL,
+                format_func=lambda p: f"{p:.0%}"
+            )
+
+            yearly_trend = memo.value('yearly_trend', lambda: selection.rollup('year')['count'].reset_index(name='incidents'))
+            trend_fit = memo.value('trend_fit', lambda: TrendFit.from_points(yearly_trend['year'], yearly_trend['incidents']))
+
+            if trend_fit.ready:
+                predictions = memo.value(
+                    f'trend_forecast_{horizon}_{level}',
+                    lambda: trend_fit.forecast(yearly_trend['year'].max(), horizon, level).clip(lower=0)
+                )
+
+                # 예측 차트 생성
+                def build_prediction_chart():
+                    fig_pred = go.Figure()
+                    fig_pred.add_trace(go.Scatter(
+                        x=yearly_trend['year'],
+                        y=yearly_trend['incidents'],
+                        mode='lines+markers',
+                        name='과거 데이터',
+                        line=dict(color='blue')
+                    ))
+                    fig_pred.add_trace(go.Scatter(
+                        x=list(predictions['x']) + list(predictions['x'][::-1]),
+                        y=list(predictions['upper']) + list(predictions['lower'][::-1]),
+                        fill='toself',
+                        fillcolor='rgba(255, 0, 0, 0.15)',
+                        line=dict(color='rgba(255, 0, 0, 0)'),
+                        hoverinfo='skip',
+                        name=f'{level:.0%} 예측 구간'
+                    ))
+                    fig_pred.add_trace(go.Scatter(
+                        x=predictions['x'],
+                        y=predictions['prediction'],
+                        mode='lines+markers',
+                        name='예측',
+                        line=dict(color='red', dash='dash')
+                    ))
+                    fig_pred.update_layout(
+                        title='사이버보안 사고 추세 예측',
+                        xaxis_title='연도',
+                        yaxis_title='사고 건수'
+                    )
+                    return fig_pred
+
+                st.plotly_chart(
+                    memo.figure(f'prediction_{horizon}_{level}', build_prediction_chart),
+                    use_container_width=True
+                )
+
+                for row in predictions.itertuples():
+                    interval = "" if math.isnan(row.lower) else f" ({level:.0%} 구간: {row.lower:,.0f} – {row.upper:,.0f})"
+                    st.info(f"{row.x}년 예상 사고 건수: {row.prediction:,.0f}{interval}")
+            else:
+                st.warning("추세 예측을 위한 데이터가 부족합니다. 더 많은 연도를 선택해주세요.")
+
+            # 국가 x 공격 유형별 모든 시계열을 큐브 위에서 한 번의 최소제곱 풀이로 예측
+            st.write("### 가장 빠르게 증가하는 위협")
+
+            segment_col1, segment_col2, segment_col3 = st.columns(3)
+            rank_labels = {
+                'growth': "증가율",
+                'slope': "연간 증가 건수",
+                'forecast': "예측값",
+                'total': "전체 사고 건수"
+            }
+            rank_by = segment_col1.selectbox("순위 기준", list(rank_labels), format_func=rank_labels.get)
+            top_n = segment_col2.slider("표시할 시계열 수", 5, 100, 20)
+            selected_only = segment_col3.checkbox("선택한 국가와 공격 유형만")
+
+            def fit_segments():
+                panel = engine.slice(year=selected_years, severity=selected_severity).panel(['country', 'attack_type'])
+                forecasts = batch_forecast(panel, horizon, level)
+                forecasts[['forecast', 'lower', 'upper']] = forecasts[['forecast', 'lower', 'upper']].clip(lower=0)
+                return forecasts
+
+            segment_forecasts = segment_memo.value(f'segment_forecast_{horizon}_{level}', fit_segments)
+            if len(selected_years) < 2:
+                st.warning("시계열별 예측을 하려면 2개 이상의 연도를 선택해주세요.")
+            else:
+                if selected_only:
+                    segment_forecasts = segment_forecasts[
+                        segment_forecasts.index.get_level_values('country').isin(selected_countries)
+                        & segment_forecasts.index.get_level_values('attack_type').isin(selected_attacks)
+                    ]
+                target_year = max(selected_years) + horizon
+                st.dataframe(
+                    tr.frame(segment_forecasts.sort_values(rank_by, ascending=False).head(top_n).reset_index()),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "country": st.column_config.TextColumn("국가"),
+                        "attack_type": st.column_config.TextColumn("공격 유형"),
+                        "total": st.column_config.NumberColumn("전체 사고 건수", format="%.0f"),
+                        "latest": st.column_config.NumberColumn(f"{max(selected_years)}년 사고 건수", format="%.0f"),
+                        "slope": st.column_config.NumberColumn("연간 증가", format="%+.1f"),
+                        "growth": st.column_config.NumberColumn("증가율", format="percent"),
+                        "forecast": st.column_config.NumberColumn(f"{target_year}년 예측", format="%.0f"),
+                        "lower": st.column_config.NumberColumn(f"{level:.0%} 하한", format="%.0f"),
+                        "upper": st.column_config.NumberColumn(f"{level:.0%} 상한", format="%.0f")
+                    }
+                )
+
+
+advanced_analysis(selection, positions, engine, memo, segment_memo, filters)
+
+# 데이터 테이블 (프래그먼트, 서버에서 정렬/페이지 나누기, 보이는 페이지만 전송)
+trace.section('table')
 st.subheader("📊 상세 데이터")
 
-# 샘플 데이터 표시
-st.dataframe(
-    filtered_df.head(1000),
-    use_container_width=True,
-    column_config={
-        "date": st.column_config.DateColumn("날짜"),
-        "financial_impact": st.column_config.NumberColumn("재정 피해", format="$%.0f"),
-        "affected_users": st.column_config.NumberColumn("피해자 수", format="%.0f")
-    }
-)
 
-# 데이터 다운로드
-csv = filtered_df.to_csv(index=False)
-st.download_button(
-    label="📥 필터링된 데이터 CSV 다운로드",
-    data=csv,
-    file_name="cybersecurity_threats_filtered.csv",
-    mime="text/csv"
-)
+@st.fragment
+@traced('fragment/table', page='dlstl')
+def data_table(engine, positions, memo):
+    table_col1, table_col2, table_col3, table_col4 = st.columns(4)
+    sort_column = table_col1.selectbox(
+        "정렬 기준",
+        [None] + list(engine.columns),
+        format_func=lambda c: "(원래 순서)" if c is None else c
+    )
+    ascending = table_col2.radio("정렬 순서", ["오름차순", "내림차순"], horizontal=True) == "오름차순"
+    page_size = table_col3.selectbox("페이지당 행 수", PAGE_SIZES, index=2)
+    n_pages = page_count(len(positions), page_size)
+    page = table_col4.number_input(f"페이지 (전체 {n_pages:,})", min_value=1, max_value=n_pages, value=1)
+
+    table_order = memo.value(
+        f'table_order_{sort_column}_{ascending}',
+        lambda: engine.sort_index.sort(positions, sort_column, ascending)
+    )
+    page_rows = page_positions(table_order, page, page_size)
+    first_row = (page - 1) * page_size
+    st.caption(f"전체 {len(positions):,}건 중 {min(first_row + 1, len(positions)):,}–{first_row + len(page_rows):,}번째")
+
+    st.dataframe(
+        tr.frame(engine.rows(page_rows)),
+        use_container_width=True,
+        column_config={
+            "date": st.column_config.DateColumn("날짜"),
+            "financial_impact": st.column_config.NumberColumn("재정 피해", format="$%.0f"),
+            "affected_users": st.column_config.NumberColumn("피해자 수", format="%.0f")
+        }
+    )
+
+
+data_table(engine, positions, memo)
+
+# 데이터 다운로드 (프래그먼트, 버튼을 누를 때만 직렬화하고 필터 상태별로 캐시, 레이블은 한국어로 변환)
+trace.section('export')
+
+
+@st.fragment
+@traced('fragment/export', page='dlstl')
+def data_export(engine, positions, memo, export_key):
+    # 행은 추정 표본과 클릭 시에만 가져와 레이블을 변환
+    def take(rows):
+        return tr.frame(engine.rows(rows))
+
+    export_format = st.radio(
+        "내보내기 형식",
+        list(EXPORT_FORMATS),
+        format_func=lambda f: EXPORT_FORMATS[f].label,
+        horizontal=True
+    )
+    export_estimate = memo.value(f'export_estimate_ko_{export_format}', lambda: estimate_export(take, positions, export_format))
+    st.caption(f"{export_estimate.rows:,}건 · 약 {format_bytes(export_estimate.bytes)}")
+    too_large = export_too_large(export_estimate)
+    if too_large:
+        st.warning(f"다운로드는 약 {format_bytes(EXPORT_MAX_MB * 2**20)}까지 가능합니다. 필터를 좁혀 주세요.")
+    st.download_button(
+        label=f"📥 필터링된 데이터 {EXPORT_FORMATS[export_format].label} 다운로드",
+        data=lazy_export(take, positions, export_format, key=export_key),
+        file_name=export_file_name("cybersecurity_threats_filtered", export_format),
+        mime=EXPORT_FORMATS[export_format].mime,
+        on_click="ignore",
+        disabled=too_large
+    )
+
+
+data_export(engine, positions, memo, ('ko', data_key, selection_key(**filters)))
 
 # 푸터
+trace.section('footer')
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666; padding: 2rem;'>
@@ -430,3 +639,20 @@ st.markdown("""
     <p>사이버보안 위협 분석 및 모니터링을 위한 데이터 시각화</p>
 </div>
 """, unsafe_allow_html=True)
+
+trace.finish()
+
+# 최근 재실행에서 가장 느린 섹션 (운영자 전용)
+if TRACE_PANEL:
+    with st.sidebar.expander("⏱️ 느린 섹션"):
+        last_reruns = st.number_input("최근 재실행 수", min_value=1, max_value=500, value=20)
+        st.dataframe(
+            slowest_sections(last=last_reruns),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "mean_ms": st.column_config.NumberColumn("평균 ms", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 ms", format="%.1f"),
+                "max_ms": st.column_config.NumberColumn("최대 ms", format="%.1f")
+            }
+        )
@@ -1,10 +1,28 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import random
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from cyberdash.config import EXPORT_MAX_MB, LIVE_FEED, LIVE_REFRESH_SECONDS, SCATTER_POINTS, TRACE_PANEL
+from cyberdash.downsample import downsample
+from cyberdash.engine import current_engine, data_status, data_years, live_ingest
+from cyberdash.export import EXPORT_FORMATS, estimate_export, export_file_name, export_too_large, format_bytes, lazy_export
+from cyberdash.forecast import HORIZON, LEVEL, TrendFit, batch_forecast
+from cyberdash.geo import choropleth_html
+from cyberdash.lazy import lazy_import
+from cyberdash.memo import ChartMemo, selection_key
+from cyberdash.refresh import format_age
+from cyberdash.table import PAGE_SIZES, page_count, page_positions
+from cyberdash.tracing import slowest_sections, span, start_rerun, traced
+
+# Plotly is only needed when a chart is not in the chart cache yet
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+# Timing spans per section (no-ops unless CYBERDASH_TRACING is set)
+trace = start_rerun('team')
 
 # Page configuration
 st.set_page_config(
@@ -39,61 +57,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Generate sample data (replace with actual data loading)
-@st.cache_data
-def load_sample_data():
-    """Generate sample cybersecurity threat data"""
-    np.random.seed(42)
-    
-    # Countries and regions
-    countries = ['USA', 'China', 'Russia', 'Germany', 'UK', 'India', 'Brazil', 'Japan', 'France', 'South Korea',
-                'Australia', 'Canada', 'Netherlands', 'Israel', 'Iran', 'North Korea', 'Ukraine', 'Turkey']
-    
-    # Attack types
-    attack_types = ['Malware', 'Phishing', 'Ransomware', 'DDoS', 'Data Breach', 'Social Engineering', 
-                   'SQL Injection', 'Zero-day Exploit', 'Insider Threat', 'APT']
-    
-    # Sectors
-    sectors = ['Finance', 'Healthcare', 'Government', 'Education', 'Technology', 'Energy', 'Retail', 
-              'Manufacturing', 'Transportation', 'Telecommunications']
-    
-    # Severity levels
-    severity_levels = ['Low', 'Medium', 'High', 'Critical']
-    
-    # Generate data for 2015-2024
-    data = []
-    for year in range(2015, 2025):
-        # More incidents in recent years
-        num_incidents = 800 + (year - 2015) * 150 + np.random.randint(-100, 200)
-        
-        for _ in range(num_incidents):
-            # Generate random date within the year
-            start_date = datetime(year, 1, 1)
-            end_date = datetime(year, 12, 31)
-            random_date = start_date + timedelta(days=np.random.randint(0, (end_date - start_date).days))
-            
-            data.append({
-                'date': random_date,
-                'year': year,
-                'month': random_date.month,
-                'country': np.random.choice(countries),
-                'attack_type': np.random.choice(attack_types),
-                'sector': np.random.choice(sectors),
-                'severity': np.random.choice(severity_levels, p=[0.3, 0.4, 0.2, 0.1]),
-                'financial_impact': np.random.exponential(50000) * (1 + (year - 2015) * 0.1),
-                'affected_users': np.random.exponential(1000) * (1 + (year - 2015) * 0.2)
-            })
-    
-    return pd.DataFrame(data)
-
-# Load data
-df = load_sample_data()
-
 # Sidebar
 st.sidebar.markdown("### 🔧 Filters")
 
-# Year filter
-years = sorted(df['year'].unique())
+# Year filter (chosen before loading so only the selected years are read)
+years = data_years()
 selected_years = st.sidebar.multiselect(
     "Select Years", 
     years, 
@@ -101,8 +69,14 @@ selected_years = st.sidebar.multiselect(
     help="Choose years to analyze"
 )
 
+# Load data: one engine (dataset, filter index, cube) shared by every page in the process
+trace.section('data load')
+engine = current_engine(selected_years)
+data_key = engine.data_key
+
 # Country filter
-countries = sorted(df['country'].unique())
+trace.section('sidebar filters')
+countries = engine.values('country')
 selected_countries = st.sidebar.multiselect(
     "Select Countries", 
     countries, 
@@ -111,7 +85,7 @@ selected_countries = st.sidebar.multiselect(
 )
 
 # Attack type filter
-attack_types = sorted(df['attack_type'].unique())
+attack_types = engine.values('attack_type')
 selected_attacks = st.sidebar.multiselect(
     "Select Attack Types", 
     attack_types, 
@@ -120,7 +94,7 @@ selected_attacks = st.sidebar.multiselect(
 )
 
 # Severity filter
-severity_levels = ['Low', 'Medium', 'High', 'Critical']
+severity_levels = engine.values('severity')
 selected_severity = st.sidebar.multiselect(
     "Select Severity Levels", 
     severity_levels, 
@@ -128,295 +102,525 @@ selected_severity = st.sidebar.multiselect(
     help="Choose severity levels to analyze"
 )
 
-# Filter data
-filtered_df = df[
-    (df['year'].isin(selected_years)) &
-    (df['country'].isin(selected_countries)) &
-    (df['attack_type'].isin(selected_attacks)) &
-    (df['severity'].isin(selected_severity))
-]
+# Data version: a newer one is loaded in the background and used from the next rerun on
+status = data_status(selected_years)
+st.sidebar.caption(
+    f"🗂️ Data version {status['version']} · loaded {format_age(time.time() - status['loaded_at'])} ago"
+    + (" · refreshing…" if status['refreshing'] else "")
+)
+
+# Filter data (OR within each filter, AND across filters, over the bitmap index or in DuckDB)
+trace.section('filter')
+filters = dict(
+    year=selected_years,
+    country=selected_countries,
+    attack_type=selected_attacks,
+    severity=selected_severity
+)
+positions = engine.positions(**filters)
+
+# Same selection on the cube (or as DuckDB queries): charts and metrics are rollups of this slice
+selection = engine.slice(**filters)
+
+# Aggregates for this filter state are shared by every page and session in the
+# process; figures are kept per page.  The data key only moves when live data
+# reaches this selection; segment forecasts depend on the years and severity only
+data_key = engine.data_key_for(positions)
+memo = ChartMemo(data_key, selection_key(**filters), scope='team')
+segment_filters = dict(year=selected_years, severity=selected_severity)
+segment_memo = ChartMemo(
+    engine.data_key_for(engine.positions(**segment_filters)), selection_key(**segment_filters), scope='team'
+)
+totals = memo.value('totals', selection.totals)
+severity_counts = memo.value('severity_counts', lambda: selection.rollup('severity')['count'])
 
 # Main dashboard
 st.markdown('<h1 class="main-header">🌐 Global Cybersecurity Threats Dashboard</h1>', unsafe_allow_html=True)
 
+# Live feed: checked on an interval; the page reruns only when new incidents
+# match the selection, and then only charts of changed selections are rebuilt
+if LIVE_FEED:
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_status(shown_key, filters):
+        engine = current_engine(filters['year'])
+        if engine.data_key_for(engine.positions(**filters)) != shown_key:
+            st.rerun()
+        status = live_ingest().status()
+        updated = "" if status['updated'] is None else f" · last at {time.strftime('%H:%M:%S', time.localtime(status['updated']))}"
+        st.caption(f"🟢 Live feed · {status['received']:,} incidents received{updated}")
+
+    live_status(data_key, filters)
+
 # Key metrics
+trace.section('kpi metrics')
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_incidents = len(filtered_df)
+    total_incidents = int(totals['count'])
     st.metric("Total Incidents", f"{total_incidents:,}")
 
 with col2:
-    avg_financial_impact = filtered_df['financial_impact'].mean()
+    avg_financial_impact = totals['impact_mean']
     st.metric("Avg Financial Impact", f"${avg_financial_impact:,.0f}")
 
 with col3:
-    total_affected_users = filtered_df['affected_users'].sum()
+    total_affected_users = totals['users_sum']
     st.metric("Total Affected Users", f"{total_affected_users:,.0f}")
 
 with col4:
-    critical_incidents = len(filtered_df[filtered_df['severity'] == 'Critical'])
+    critical_incidents = int(severity_counts.get('Critical', 0))
     st.metric("Critical Incidents", f"{critical_incidents:,}")
 
 st.markdown("---")
 
 # Charts section
+trace.section('charts')
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span('chart/time'):
     st.subheader("📈 Threats Over Time")
     
     # Time series chart
-    time_series = filtered_df.groupby('year').size().reset_index(name='incidents')
-    fig_time = px.line(
-        time_series, 
-        x='year', 
-        y='incidents',
-        title='Cybersecurity Incidents by Year',
-        markers=True
-    )
-    fig_time.update_layout(
-        xaxis_title="Year",
-        yaxis_title="Number of Incidents",
-        hovermode='x unified'
-    )
-    st.plotly_chart(fig_time, use_container_width=True)
+    def build_time_chart():
+        time_series = selection.rollup('year')['count'].reset_index(name='incidents')
+        fig_time = px.line(
+            time_series, 
+            x='year', 
+            y='incidents',
+            title='Cybersecurity Incidents by Year',
+            markers=True
+        )
+        fig_time.update_layout(
+            xaxis_title="Year",
+            yaxis_title="Number of Incidents",
+            hovermode='x unified'
+        )
+        return fig_time
 
-with col2:
+    st.plotly_chart(memo.figure('time', build_time_chart), use_container_width=True)
+
+with col2, span('chart/attack_types'):
     st.subheader("🎯 Attack Types Distribution")
     
     # Attack types pie chart
-    attack_dist = filtered_df['attack_type'].value_counts().reset_index()
-    attack_dist.columns = ['attack_type', 'count']
-    
-    fig_pie = px.pie(
-        attack_dist, 
-        values='count', 
-        names='attack_type',
-        title='Distribution of Attack Types'
-    )
-    st.plotly_chart(fig_pie, use_container_width=True)
+    def build_attack_chart():
+        attack_dist = selection.rollup('attack_type')['count'].sort_values(ascending=False).reset_index()
+        attack_dist.columns = ['attack_type', 'count']
+        
+        return px.pie(
+            attack_dist, 
+            values='count', 
+            names='attack_type',
+            title='Distribution of Attack Types'
+        )
+
+    st.plotly_chart(memo.figure('attack_types', build_attack_chart), use_container_width=True)
 
 # Geographic analysis
+trace.section('geographic')
 st.subheader("🌍 Geographic Distribution")
 
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span('chart/countries'):
     # Top countries by incidents
-    country_stats = filtered_df.groupby('country').agg({
-        'attack_type': 'count',
-        'financial_impact': 'mean',
-        'affected_users': 'sum'
-    }).round(2)
-    country_stats.columns = ['Incidents', 'Avg Financial Impact', 'Total Affected Users']
-    country_stats = country_stats.sort_values('Incidents', ascending=False)
-    
-    fig_country = px.bar(
-        country_stats.head(10).reset_index(),
-        x='country',
-        y='Incidents',
-        title='Top 10 Countries by Incidents',
-        color='Incidents',
-        color_continuous_scale='Reds'
-    )
-    fig_country.update_layout(xaxis_title="Country", yaxis_title="Number of Incidents")
-    st.plotly_chart(fig_country, use_container_width=True)
+    def build_country_chart():
+        country_stats = selection.rollup('country')[['count', 'impact_mean', 'users_sum']].round(2)
+        country_stats.columns = ['Incidents', 'Avg Financial Impact', 'Total Affected Users']
+        country_stats = country_stats.sort_values('Incidents', ascending=False)
+        
+        fig_country = px.bar(
+            country_stats.head(10).reset_index(),
+            x='country',
+            y='Incidents',
+            title='Top 10 Countries by Incidents',
+            color='Incidents',
+            color_continuous_scale='Reds'
+        )
+        fig_country.update_layout(xaxis_title="Country", yaxis_title="Number of Incidents")
+        return fig_country
 
-with col2:
+    st.plotly_chart(memo.figure('countries', build_country_chart), use_container_width=True)
+
+with col2, span('chart/severity_by_country'):
     # Severity distribution by country
-    severity_country = filtered_df.groupby(['country', 'severity']).size().reset_index(name='count')
-    
-    fig_severity = px.bar(
-        severity_country,
-        x='country',
-        y='count',
-        color='severity',
-        title='Severity Distribution by Country',
-        color_discrete_map={
-            'Low': '#2ecc71',
-            'Medium': '#f39c12',
-            'High': '#e74c3c',
-            'Critical': '#8e44ad'
-        }
+    def build_severity_chart():
+        severity_country = selection.rollup('country', 'severity')['count'].reset_index()
+        
+        fig_severity = px.bar(
+            severity_country,
+            x='country',
+            y='count',
+            color='severity',
+            title='Severity Distribution by Country',
+            color_discrete_map={
+                'Low': '#2ecc71',
+                'Medium': '#f39c12',
+                'High': '#e74c3c',
+                'Critical': '#8e44ad'
+            }
+        )
+        fig_severity.update_layout(xaxis_title="Country", yaxis_title="Number of Incidents")
+        return fig_severity
+
+    st.plotly_chart(memo.figure('severity_by_country', build_severity_chart), use_container_width=True)
+
+# Choropleth map (shapes and map page are cached once; a filter change only recolors the countries).
+# Sections with their own widgets are fragments: those widgets rerun only their
+# fragment, which gets the filter state it depends on as arguments
+trace.section('map')
+
+
+@st.fragment
+@traced('fragment/map', page='team')
+def choropleth_map(selection, memo):
+    map_measures = {
+        'count': ("Incidents", '{:,.0f}'),
+        'impact_sum': ("Total Financial Impact", '${:,.0f}'),
+        'impact_mean': ("Avg Financial Impact", '${:,.0f}')
+    }
+    map_measure = st.radio(
+        "Color countries by",
+        list(map_measures),
+        format_func=lambda m: map_measures[m][0],
+        horizontal=True
     )
-    fig_severity.update_layout(xaxis_title="Country", yaxis_title="Number of Incidents")
-    st.plotly_chart(fig_severity, use_container_width=True)
+    country_map = memo.value(
+        f'country_map_en_{map_measure}',
+        lambda: choropleth_html(
+            selection.rollup('country')[map_measure].to_dict(),
+            value_format=map_measures[map_measure][1],
+            title=map_measures[map_measure][0]
+        )
+    )
+    st.iframe(country_map, height=450)
+
+
+choropleth_map(selection, memo)
 
 # Sector analysis
+trace.section('sectors')
 st.subheader("🏢 Sector Analysis")
 
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span('chart/sectors'):
     # Sector incidents
-    sector_stats = filtered_df.groupby('sector').agg({
-        'attack_type': 'count',
-        'financial_impact': 'mean'
-    }).round(2)
-    sector_stats.columns = ['Incidents', 'Avg Financial Impact']
-    sector_stats = sector_stats.sort_values('Incidents', ascending=True)
-    
-    fig_sector = px.bar(
-        sector_stats.reset_index(),
-        x='Incidents',
-        y='sector',
-        title='Incidents by Sector',
-        orientation='h',
-        color='Avg Financial Impact',
-        color_continuous_scale='Viridis'
-    )
-    st.plotly_chart(fig_sector, use_container_width=True)
+    def build_sector_chart():
+        sector_stats = selection.rollup('sector')[['count', 'impact_mean']].round(2)
+        sector_stats.columns = ['Incidents', 'Avg Financial Impact']
+        sector_stats = sector_stats.sort_values('Incidents', ascending=True)
+        
+        return px.bar(
+            sector_stats.reset_index(),
+            x='Incidents',
+            y='sector',
+            title='Incidents by Sector',
+            orientation='h',
+            color='Avg Financial Impact',
+            color_continuous_scale='Viridis'
+        )
 
-with col2:
+    st.plotly_chart(memo.figure('sectors', build_sector_chart), use_container_width=True)
+
+with col2, span('chart/monthly'):
     # Monthly trend
-    monthly_trend = filtered_df.groupby('month').size().reset_index(name='incidents')
-    monthly_trend['month_name'] = monthly_trend['month'].apply(
-        lambda x: ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'][x-1]
-    )
-    
-    fig_monthly = px.line(
-        monthly_trend,
-        x='month_name',
-        y='incidents',
-        title='Monthly Incident Pattern',
-        markers=True
-    )
-    fig_monthly.update_layout(xaxis_title="Month", yaxis_title="Number of Incidents")
-    st.plotly_chart(fig_monthly, use_container_width=True)
+    def build_monthly_chart():
+        monthly_trend = selection.rollup('month')['count'].reset_index(name='incidents')
+        monthly_trend['month_name'] = monthly_trend['month'].apply(
+            lambda x: ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'][x-1]
+        )
+        
+        fig_monthly = px.line(
+            monthly_trend,
+            x='month_name',
+            y='incidents',
+            title='Monthly Incident Pattern',
+            markers=True
+        )
+        fig_monthly.update_layout(xaxis_title="Month", yaxis_title="Number of Incidents")
+        return fig_monthly
 
-# Advanced analysis
+    st.plotly_chart(memo.figure('monthly', build_monthly_chart), use_container_width=True)
+
+# Advanced analysis (fragment, only the open tab is computed)
+trace.section('advanced')
 st.subheader("🔍 Advanced Analysis")
 
-tab1, tab2, tab3 = st.tabs(["Financial Impact", "Correlation Analysis", "Trend Prediction"])
 
-with tab1:
-    # Financial impact analysis
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Financial impact by attack type
-        financial_impact = filtered_df.groupby('attack_type')['financial_impact'].agg(['mean', 'sum']).round(2)
-        financial_impact.columns = ['Average Impact', 'Total Impact']
-        financial_impact = financial_impact.sort_values('Average Impact', ascending=False)
-        
-        fig_financial = px.bar(
-            financial_impact.reset_index(),
-            x='attack_type',
-            y='Average Impact',
-            title='Average Financial Impact by Attack Type',
-            color='Average Impact',
-            color_continuous_scale='Reds'
-        )
-        fig_financial.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig_financial, use_container_width=True)
-    
-    with col2:
-        # Scatter plot: Financial impact vs affected users
-        fig_scatter = px.scatter(
-            filtered_df.sample(min(1000, len(filtered_df))),
-            x='affected_users',
-            y='financial_impact',
-            color='severity',
-            size='affected_users',
-            hover_data=['country', 'attack_type'],
-            title='Financial Impact vs Affected Users',
-            color_discrete_map={
-                'Low': '#2ecc71',
-                'Medium': '#f39c12',
-                'High': '#e74c3c',
-                'Critical': '#8e44ad'
-            }
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
+@st.fragment
+@traced('fragment/advanced', page='team')
+def advanced_analysis(selection, positions, engine, memo, segment_memo, filters):
+    selected_years, selected_countries = filters['year'], filters['country']
+    selected_attacks, selected_severity = filters['attack_type'], filters['severity']
 
-with tab2:
-    # Correlation heatmap
-    st.write("### Attack Type and Sector Correlation")
-    
-    correlation_data = pd.crosstab(filtered_df['attack_type'], filtered_df['sector'])
-    
-    fig_heatmap = px.imshow(
-        correlation_data,
-        title='Attack Type vs Sector Heatmap',
-        color_continuous_scale='RdYlBu_r',
-        aspect='auto'
+    # Tabs track their state, so switching tabs reruns just this fragment
+    tab1, tab2, tab3 = st.tabs(
+        ["Financial Impact", "Correlation Analysis", "Trend Prediction"],
+        key="team_advanced_tab",
+        on_change="rerun"
     )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
 
-with tab3:
-    # Simple trend prediction
-    st.write("### Incident Trend Prediction")
-    
-    yearly_trend = filtered_df.groupby('year').size().reset_index(name='incidents')
-    
-    # Simple linear regression for prediction
-    from sklearn.linear_model import LinearRegression
+    if tab1.open:
+        with tab1:
+            # Financial impact analysis
+            col1, col2 = st.columns(2)
     
-    X = yearly_trend['year'].values.reshape(-1, 1)
-    y = yearly_trend['incidents'].values
-    
-    model = LinearRegression()
-    model.fit(X, y)
-    
-    # Predict next 2 years
-    future_years = np.array([[2025], [2026]])
-    predictions = model.predict(future_years)
+            with col1, span('chart/financial'):
+                # Financial impact by attack type
+                def build_financial_chart():
+                    financial_impact = selection.rollup('attack_type')[['impact_mean', 'impact_sum']].round(2)
+                    financial_impact.columns = ['Average Impact', 'Total Impact']
+                    financial_impact = financial_impact.sort_values('Average Impact', ascending=False)
+            
+                    fig_financial = px.bar(
+                        financial_impact.reset_index(),
+                        x='attack_type',
+                        y='Average Impact',
+                        title='Average Financial Impact by Attack Type',
+                        color='Average Impact',
+                        color_continuous_scale='Reds'
+                    )
+                    fig_financial.update_layout(xaxis_tickangle=-45)
+                    return fig_financial
+
+                st.plotly_chart(memo.figure('financial', build_financial_chart), use_container_width=True)
     
-    # Create prediction chart
-    extended_years = list(yearly_trend['year']) + [2025, 2026]
-    extended_incidents = list(yearly_trend['incidents']) + list(predictions)
+            with col2, span('chart/scatter'):
+                # Scatter plot: Financial impact vs affected users (WebGL, deterministic downsample)
+                def build_scatter_chart():
+                    # Rows are only taken when the figure is not memoized
+                    filtered_df = engine.rows(positions)
+                    scatter_df = filtered_df.iloc[
+                        downsample(filtered_df, 'affected_users', 'financial_impact', 'severity', max_points=SCATTER_POINTS)
+                    ]
+                    scatter_note = f' ({len(scatter_df):,} of {len(filtered_df):,} shown)' if len(scatter_df) < len(filtered_df) else ''
+                    return px.scatter(
+                        scatter_df,
+                        x='affected_users',
+                        y='financial_impact',
+                        color='severity',
+                        hover_data=['country', 'attack_type'],
+                        title='Financial Impact vs Affected Users' + scatter_note,
+                        render_mode='webgl',
+                        opacity=0.7,
+                        color_discrete_map={
+                            'Low': '#2ecc71',
+                            'Medium': '#f39c12',
+                            'High': '#e74c3c',
+                            'Critical': '#8e44ad'
+                        }
+                    )
+
+                st.plotly_chart(memo.figure('scatter', build_scatter_chart), use_container_width=True)
+
+    if tab2.open:
+        with tab2, span('chart/heatmap'):
+            # Correlation heatmap
+            st.write("### Attack Type and Sector Correlation")
     
-    fig_pred = go.Figure()
-    fig_pred.add_trace(go.Scatter(
-        x=yearly_trend['year'],
-        y=yearly_trend['incidents'],
-        mode='lines+markers',
-        name='Historical Data',
-        line=dict(color='blue')
-    ))
-    fig_pred.add_trace(go.Scatter(
-        x=[2025, 2026],
-        y=predictions,
-        mode='lines+markers',
-        name='Prediction',
-        line=dict(color='red', dash='dash')
-    ))
-    fig_pred.update_layout(
-        title='Cybersecurity Incidents Trend Prediction',
-        xaxis_title='Year',
-        yaxis_title='Number of Incidents'
+            def build_heatmap():
+                correlation_data = selection.crosstab('attack_type', 'sector')
+        
+                return px.imshow(
+                    correlation_data,
+                    title='Attack Type vs Sector Heatmap',
+                    color_continuous_scale='RdYlBu_r',
+                    aspect='auto'
+                )
+
+            st.plotly_chart(memo.figure('heatmap', build_heatmap), use_container_width=True)
+
+    if tab3.open:
+        with tab3, span('chart/trend'):
+            # Linear trend forecast (closed-form fit, cached per filter state)
+            st.write("### Incident Trend Prediction")
+
+            forecast_col1, forecast_col2 = st.columns(2)
+            horizon = forecast_col1.slider("Forecast horizon (years)", 1, 5, HORIZON)
+            level = forecast_col2.select_slider(
+                "Prediction interval",
+                [0.8, 0.9, 0.95, 0.99],
+                value=LEVEL,
+                format_func=lambda p: f"{p:.0%}"
+            )
+
+            yearly_trend = memo.value('yearly_trend', lambda: selection.rollup('year')['count'].reset_index(name='incidents'))
+            trend_fit = memo.value('trend_fit', lambda: TrendFit.from_points(yearly_trend['year'], yearly_trend['incidents']))
+
+            if trend_fit.ready:
+                predictions = memo.value(
+                    f'trend_forecast_{horizon}_{level}',
+                    lambda: trend_fit.forecast(yearly_trend['year'].max(), horizon, level).clip(lower=0)
+                )
+
+                # Create prediction chart
+                def build_prediction_chart():
+                    fig_pred = go.Figure()
+                    fig_pred.add_trace(go.Scatter(
+                        x=yearly_trend['year'],
+                        y=yearly_trend['incidents'],
+                        mode='lines+markers',
+                        name='Historical Data',
+                        line=dict(color='blue')
+                    ))
+                    fig_pred.add_trace(go.Scatter(
+                        x=list(predictions['x']) + list(predictions['x'][::-1]),
+                        y=list(predictions['upper']) + list(predictions['lower'][::-1]),
+                        fill='toself',
+                        fillcolor='rgba(255, 0, 0, 0.15)',
+                        line=dict(color='rgba(255, 0, 0, 0)'),
+                        hoverinfo='skip',
+                        name=f'{level:.0%} Prediction Interval'
+                    ))
+                    fig_pred.add_trace(go.Scatter(
+                        x=predictions['x'],
+                        y=predictions['prediction'],
+                        mode='lines+markers',
+                        name='Prediction',
+                        line=dict(color='red', dash='dash')
+                    ))
+                    fig_pred.update_layout(
+                        title='Cybersecurity Incidents Trend Prediction',
+                        xaxis_title='Year',
+                        yaxis_title='Number of Incidents'
+                    )
+                    return fig_pred
+
+                st.plotly_chart(
+                    memo.figure(f'prediction_{horizon}_{level}', build_prediction_chart),
+                    use_container_width=True
+                )
+
+                for row in predictions.itertuples():
+                    interval = "" if math.isnan(row.lower) else f" ({level:.0%} interval: {row.lower:,.0f} – {row.upper:,.0f})"
+                    st.info(f"Predicted incidents for {row.x}: {row.prediction:,.0f}{interval}")
+            else:
+                st.warning("Not enough data for a trend prediction. Please select more years.")
+
+            # Every country x attack type series forecast in one stacked solve over the cube
+            st.write("### Fastest Growing Threats")
+
+            segment_col1, segment_col2, segment_col3 = st.columns(3)
+            rank_labels = {
+                'growth': "Growth rate",
+                'slope': "Incidents added per year",
+                'forecast': "Forecast",
+                'total': "Total incidents"
+            }
+            rank_by = segment_col1.selectbox("Rank by", list(rank_labels), format_func=rank_labels.get)
+            top_n = segment_col2.slider("Series shown", 5, 100, 20)
+            selected_only = segment_col3.checkbox("Only selected countries and attack types")
+
+            def fit_segments():
+                panel = engine.slice(year=selected_years, severity=selected_severity).panel(['country', 'attack_type'])
+                forecasts = batch_forecast(panel, horizon, level)
+                forecasts[['forecast', 'lower', 'upper']] = forecasts[['forecast', 'lower', 'upper']].clip(lower=0)
+                return forecasts
+
+            segment_forecasts = segment_memo.value(f'segment_forecast_{horizon}_{level}', fit_segments)
+            if len(selected_years) < 2:
+                st.warning("Select at least two years to forecast each series.")
+            else:
+                if selected_only:
+                    segment_forecasts = segment_forecasts[
+                        segment_forecasts.index.get_level_values('country').isin(selected_countries)
+                        & segment_forecasts.index.get_level_values('attack_type').isin(selected_attacks)
+                    ]
+                target_year = max(selected_years) + horizon
+                st.dataframe(
+                    segment_forecasts.sort_values(rank_by, ascending=False).head(top_n).reset_index(),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "country": st.column_config.TextColumn("Country"),
+                        "attack_type": st.column_config.TextColumn("Attack Type"),
+                        "total": st.column_config.NumberColumn("Total Incidents", format="%.0f"),
+                        "latest": st.column_config.NumberColumn(f"Incidents in {max(selected_years)}", format="%.0f"),
+                        "slope": st.column_config.NumberColumn("Per Year", format="%+.1f"),
+                        "growth": st.column_config.NumberColumn("Growth Rate", format="percent"),
+                        "forecast": st.column_config.NumberColumn(f"Forecast {target_year}", format="%.0f"),
+                        "lower": st.column_config.NumberColumn(f"{level:.0%} Lower", format="%.0f"),
+                        "upper": st.column_config.NumberColumn(f"{level:.0%} Upper", format="%.0f")
+                    }
+                )
+
+
+advanced_analysis(selection, positions, engine, memo, segment_memo, filters)
+
+# Data table (fragment; sorted and paged on the server, only the visible page is sent)
+trace.section('table')
+st.subheader("📊 Detailed Data")
+
+
+@st.fragment
+@traced('fragment/table', page='team')
+def data_table(engine, positions, memo):
+    table_col1, table_col2, table_col3, table_col4 = st.columns(4)
+    sort_column = table_col1.selectbox(
+        "Sort by",
+        [None] + list(engine.columns),
+        format_func=lambda c: "(original order)" if c is None else c
+    )
+    ascending = table_col2.radio("Order", ["Ascending", "Descending"], horizontal=True) == "Ascending"
+    page_size = table_col3.selectbox("Rows per page", PAGE_SIZES, index=2)
+    n_pages = page_count(len(positions), page_size)
+    page = table_col4.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1)
+
+    table_order = memo.value(
+        f'table_order_{sort_column}_{ascending}',
+        lambda: engine.sort_index.sort(positions, sort_column, ascending)
+    )
+    page_rows = page_positions(table_order, page, page_size)
+    first_row = (page - 1) * page_size
+    st.caption(f"Rows {min(first_row + 1, len(positions)):,}–{first_row + len(page_rows):,} of {len(positions):,}")
+
+    st.dataframe(
+        engine.rows(page_rows),
+        use_container_width=True,
+        column_config={
+            "date": st.column_config.DateColumn("Date"),
+            "financial_impact": st.column_config.NumberColumn("Financial Impact", format="$%.0f"),
+            "affected_users": st.column_config.NumberColumn("Affected Users", format="%.0f")
+        }
     )
-    st.plotly_chart(fig_pred, use_container_width=True)
-    
-    st.info(f"Predicted incidents for 2025: {int(predictions[0]):,}")
-    st.info(f"Predicted incidents for 2026: {int(predictions[1]):,}")
 
-# Data table
-st.subheader("📊 Detailed Data")
 
-# Display sample data
-st.dataframe(
-    filtered_df.head(1000),
-    use_container_width=True,
-    column_config={
-        "date": st.column_config.DateColumn("Date"),
-        "financial_impact": st.column_config.NumberColumn("Financial Impact", format="$%.0f"),
-        "affected_users": st.column_config.NumberColumn("Affected Users", format="%.0f")
-    }
-)
+data_table(engine, positions, memo)
+
+# Download data (fragment; streamed to a spool file only when the button is clicked, cached per filter state)
+trace.section('export')
 
-# Download data
-csv = filtered_df.to_csv(index=False)
-st.download_button(
-    label="📥 Download Filtered Data as CSV",
-    data=csv,
-    file_name="cybersecurity_threats_filtered.csv",
-    mime="text/csv"
-)
+
+@st.fragment
+@traced('fragment/export', page='team')
+def data_export(engine, positions, memo, export_key):
+    export_format = st.radio(
+        "Export format",
+        list(EXPORT_FORMATS),
+        format_func=lambda f: EXPORT_FORMATS[f].label,
+        horizontal=True
+    )
+    export_estimate = memo.value(f'export_estimate_en_{export_format}', lambda: estimate_export(engine.rows, positions, export_format))
+    st.caption(f"{export_estimate.rows:,} rows · about {format_bytes(export_estimate.bytes)}")
+    too_large = export_too_large(export_estimate)
+    if too_large:
+        st.warning(f"Downloads are limited to about {format_bytes(EXPORT_MAX_MB * 2**20)}; narrow the filters to export this selection.")
+    st.download_button(
+        label=f"📥 Download Filtered Data as {EXPORT_FORMATS[export_format].label}",
+        data=lazy_export(engine.rows, positions, export_format, key=export_key),
+        file_name=export_file_name("cybersecurity_threats_filtered", export_format),
+        mime=EXPORT_FORMATS[export_format].mime,
+        on_click="ignore",
+        disabled=too_large
+    )
+
+
+data_export(engine, positions, memo, ('en', data_key, selection_key(**filters)))
 
 # Footer
+trace.section('footer')
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666; padding: 2rem;'>
@@ -424,3 +628,19 @@ st.markdown("""
     <p>Data visualization for cybersecurity threat analysis and monitoring</p>
 </div>
 """, unsafe_allow_html=True)
+trace.finish()
+
+# Slowest sections of the last reruns in this process (operators only)
+if TRACE_PANEL:
+    with st.sidebar.expander("⏱️ Slowest sections"):
+        last_reruns = st.number_input("Last reruns", min_value=1, max_value=500, value=20)
+        st.dataframe(
+            slowest_sections(last=last_reruns),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "mean_ms": st.column_config.NumberColumn("Mean ms", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 ms", format="%.1f"),
+                "max_ms": st.column_config.NumberColumn("Max ms", format="%.1f")
+            }
+        )
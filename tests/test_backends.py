@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cyberdash.cube import IncidentCube
+from cyberdash.generator import generate_incidents
+from cyberdash.index import BitmapIndex
+
+duckdb_backend = pytest.importorskip('cyberdash.duck')
+
+SELECTIONS = [
+    dict(year=None, country=None, attack_type=None, severity=None),
+    dict(year=[2022, 2023], country=None, attack_type=None, severity=['High', 'Critical']),
+]
+
+
+@pytest.fixture(scope='module')
+def gappy():
+    """Sample incidents with some countries and years missing"""
+    df = generate_incidents(20_000, seed=7)
+    rows = np.arange(len(df))
+    df['country'] = df['country'].mask(rows % 50 == 0)
+    df['year'] = df['year'].astype('Int16').mask(rows % 70 == 1)
+    return df
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_duckdb_matches_cube_with_missing_labels(gappy, selection):
+    cube, sql = IncidentCube(gappy, workers=1).slice(**selection), duckdb_backend.DuckDBBackend(gappy).slice(**selection)
+    pd.testing.assert_series_equal(sql.totals(), cube.totals(), rtol=1e-9)
+    for dims in (('country',), ('year',), ('country', 'severity')):
+        pd.testing.assert_frame_equal(sql.rollup(*dims), cube.rollup(*dims), rtol=1e-9)
+    pd.testing.assert_frame_equal(sql.crosstab('attack_type', 'sector'), cube.crosstab('attack_type', 'sector'))
+
+
+@pytest.mark.parametrize('selection', SELECTIONS + [dict(country=['Germany', 'Japan'])])
+def test_duckdb_positions_match_index(gappy, selection):
+    np.testing.assert_array_equal(duckdb_backend.DuckDBBackend(gappy).positions(**selection),
+                                  BitmapIndex(gappy).positions(**selection))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from cyberdash.cube import IncidentCube
+from cyberdash.engine import DashboardEngine
+from cyberdash.generator import generate_incidents
+from cyberdash.index import BitmapIndex
+
+
+@pytest.fixture(scope='module')
+def df():
+    return generate_incidents(30_000, seed=11)
+
+
+def test_sharded_cube_is_bit_identical(df):
+    gappy = df.assign(year=df['year'].astype('Int16').mask(np.arange(len(df)) % 7 == 3))
+    single = IncidentCube(gappy, workers=1)
+    assert IncidentCube(gappy, workers=3).values.tobytes() == single.values.tobytes()
+
+
+@pytest.mark.parametrize('sizes', [[10_000], [2_500] * 4, [1, 9_998, 1]])
+def test_appended_cube_and_index_match_a_rebuild(df, sizes):
+    base = DashboardEngine(df.iloc[:20_000])
+    # Built before the append, so they are extended rather than rebuilt
+    base.cube, base.index
+    batch = df.iloc[20_000:].reset_index(drop=True)
+    engine = base.append(batch, sizes)
+    assert engine.cube.values.tobytes() == IncidentCube(df, workers=1).values.tobytes()
+    rebuilt = BitmapIndex(df)
+    for dim, bitmaps in rebuilt.bitmaps.items():
+        assert list(engine.index.bitmaps[dim]) == list(bitmaps)
+        for value, bits in bitmaps.items():
+            np.testing.assert_array_equal(engine.index.bitmaps[dim][value], bits)
+
+
+def test_batches_appended_one_by_one_match_a_rebuild(df):
+    cube = IncidentCube(df.iloc[:20_000], workers=1)
+    for start in range(20_000, len(df), 1_000):
+        cube = cube.append(df.iloc[start:start + 1_000].reset_index(drop=True))
+    assert cube.values.tobytes() == IncidentCube(df, workers=1).values.tobytes()
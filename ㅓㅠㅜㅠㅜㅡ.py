@@ -1,11 +1,23 @@
 # cyber_dashboard.py
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import time
+from cyberdash.config import EXPORT_MAX_MB, LIVE_FEED, LIVE_REFRESH_SECONDS, TRACE_PANEL
+from cyberdash.engine import current_engine, data_status, data_years, live_ingest
+from cyberdash.export import EXPORT_FORMATS, estimate_export, export_file_name, export_too_large, format_bytes, lazy_export
+from cyberdash.i18n import Translator
+from cyberdash.lazy import lazy_import
+from cyberdash.memo import ChartMemo, selection_key
+from cyberdash.refresh import format_age
+from cyberdash.table import PAGE_SIZES, page_count, page_positions
+from cyberdash.tracing import slowest_sections, start_rerun, traced
+
+# Plotly은 차트 캐시에 없는 차트를 처음 그릴 때만 불러오기
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+# 섹션별 시간 측정 (CYBERDASH_TRACING을 켜지 않으면 아무 일도 하지 않음)
+trace = start_rerun('cyber_dashboard')
 
 # 페이지 설정
 st.set_page_config(
@@ -30,111 +42,142 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 샘플 데이터 생성 함수
-@st.cache_data
-def load_sample_data():
-    np.random.seed(42)
-    countries = ['미국', '중국', '러시아', '독일', '영국', '인도', '브라질', '일본', '프랑스', '한국',
-                '호주', '캐나다', '네덜란드', '이스라엘', '이란', '북한', '우크라이나', '터키']
-    attack_types = ['악성코드', '피싱', '랜섬웨어', 'DDoS', '데이터 유출', '사회공학', 
-                   'SQL 인젝션', '제로데이 익스플로잇', '내부자 위협', 'APT']
-    sectors = ['금융', '의료', '정부', '교육', '기술', '에너지', '소매', 
-              '제조', '교통', '통신']
-    severity_levels = ['낮음', '보통', '높음', '치명적']
-    
-    data = []
-    for year in range(2015, 2025):
-        num_incidents = 800 + (year - 2015) * 150 + np.random.randint(-100, 200)
-        for _ in range(num_incidents):
-            start_date = datetime(year, 1, 1)
-            end_date = datetime(year, 12, 31)
-            random_date = start_date + timedelta(days=np.random.randint(0, 365))
-            data.append({
-                'date': random_date,
-                'year': year,
-                'month': random_date.month,
-                'country': np.random.choice(countries),
-                'attack_type': np.random.choice(attack_types),
-                'sector': np.random.choice(sectors),
-                'severity': np.random.choice(severity_levels, p=[0.3, 0.4, 0.2, 0.1]),
-                'financial_impact': np.random.exponential(50000) * (1 + (year - 2015) * 0.1),
-                'affected_users': np.random.exponential(1000) * (1 + (year - 2015) * 0.2)
-            })
-    return pd.DataFrame(data)
-
-# 데이터 불러오기
-df = load_sample_data()
-
-# 사이드바 필터
+# 데이터는 영어 원본 레이블, 화면에 그릴 때만 한국어로 변환
+tr = Translator('ko')
+
+# 사이드바 필터 (연도를 먼저 골라 선택한 연도만 불러오기)
 st.sidebar.markdown("### 🔧 필터")
-years = sorted(df['year'].unique())
+years = data_years()
 selected_years = st.sidebar.multiselect("연도 선택", years, default=years[-3:])
-countries = sorted(df['country'].unique())
-selected_countries = st.sidebar.multiselect("국가 선택", countries, default=countries[:5])
-attack_types = sorted(df['attack_type'].unique())
-selected_attacks = st.sidebar.multiselect("공격 유형 선택", attack_types, default=attack_types)
-severity_levels = ['낮음', '보통', '높음', '치명적']
-selected_severity = st.sidebar.multiselect("심각도 수준 선택", severity_levels, default=severity_levels)
-
-# 필터링
-filtered_df = df[
-    (df['year'].isin(selected_years)) &
-    (df['country'].isin(selected_countries)) &
-    (df['attack_type'].isin(selected_attacks)) &
-    (df['severity'].isin(selected_severity))
-]
+
+# 데이터 불러오기 (모든 페이지가 공유하는 엔진)
+trace.section('data load')
+engine = current_engine(selected_years)
+data_key = engine.data_key
+countries = tr.sorted(engine.values('country'))
+selected_countries = st.sidebar.multiselect("국가 선택", countries, default=countries[:5], format_func=tr)
+attack_types = tr.sorted(engine.values('attack_type'))
+selected_attacks = st.sidebar.multiselect("공격 유형 선택", attack_types, default=attack_types, format_func=tr)
+severity_levels = engine.values('severity')
+selected_severity = st.sidebar.multiselect("심각도 수준 선택", severity_levels, default=severity_levels, format_func=tr)
+status = data_status(selected_years)
+st.sidebar.caption(f"🗂️ 데이터 버전 {status['version']} · {format_age(time.time() - status['loaded_at'], 'ko')} 전 로드"
+                   + (" · 새로고침 중…" if status['refreshing'] else ""))
+
+# 필터링 (비트맵 인덱스 또는 DuckDB)
+trace.section('filter')
+filters = dict(year=selected_years, country=selected_countries,
+               attack_type=selected_attacks, severity=selected_severity)
+positions = engine.positions(**filters)
+selection = engine.slice(**filters)
+
+# 필터 상태별 집계 캐시 (모든 페이지/세션이 공유), 차트는 페이지별로 캐시, 데이터 키는 실시간 데이터가 이 선택에 들어올 때만 바뀜
+data_key = engine.data_key_for(positions)
+memo = ChartMemo(data_key, selection_key(**filters), scope='cyber_dashboard')
+totals = memo.value('totals', selection.totals)
+severity_counts = memo.value('severity_counts', lambda: selection.rollup('severity')['count'])
 
 # 헤더
 st.markdown('<h1 class="main-header">🌐 글로벌 사이버보안 위협 대시보드</h1>', unsafe_allow_html=True)
 
+# 실시간 피드: 주기적으로 확인하고 새 사고가 선택에 해당할 때만 페이지를 다시 실행
+if LIVE_FEED:
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_status(shown_key, filters):
+        engine = current_engine(filters['year'])
+        if engine.data_key_for(engine.positions(**filters)) != shown_key:
+            st.rerun()
+        st.caption(f"🟢 실시간 피드 · 수신 {live_ingest().status()['received']:,}건")
+    live_status(data_key, filters)
+
 # 주요 지표
+trace.section('kpi metrics')
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("총 사고 건수", f"{len(filtered_df):,}")
+    st.metric("총 사고 건수", f"{int(totals['count']):,}")
 with col2:
-    st.metric("평균 재정 피해", f"${filtered_df['financial_impact'].mean():,.0f}")
+    st.metric("평균 재정 피해", f"${totals['impact_mean']:,.0f}")
 with col3:
-    st.metric("총 피해자 수", f"{filtered_df['affected_users'].sum():,.0f}")
+    st.metric("총 피해자 수", f"{totals['users_sum']:,.0f}")
 with col4:
-    st.metric("치명적 사고", f"{len(filtered_df[filtered_df['severity'] == '치명적']):,}")
+    st.metric("치명적 사고", f"{int(severity_counts.get('Critical', 0)):,}")
 
 st.markdown("---")
 
 # 그래프 1: 연도별 사고
+trace.section('chart/time')
 st.subheader("📈 시간별 위협 추이")
-time_series = filtered_df.groupby('year').size().reset_index(name='incidents')
-fig1 = px.line(time_series, x='year', y='incidents', markers=True, title='연도별 사이버보안 사고')
-st.plotly_chart(fig1, use_container_width=True)
+def build_fig1():
+    time_series = selection.rollup('year')['count'].reset_index(name='incidents')
+    return px.line(time_series, x='year', y='incidents', markers=True, title='연도별 사이버보안 사고')
+st.plotly_chart(memo.figure('time', build_fig1), use_container_width=True)
 
 # 그래프 2: 공격 유형 분포
+trace.section('chart/attack_types')
 st.subheader("🎯 공격 유형 분포")
-attack_dist = filtered_df['attack_type'].value_counts().reset_index()
-attack_dist.columns = ['attack_type', 'count']
-fig2 = px.pie(attack_dist, values='count', names='attack_type', title='공격 유형 분포')
-st.plotly_chart(fig2, use_container_width=True)
+def build_fig2():
+    attack_dist = selection.rollup('attack_type')['count'].sort_values(ascending=False).reset_index()
+    attack_dist.columns = ['attack_type', 'count']
+    return px.pie(tr.frame(attack_dist), values='count', names='attack_type', title='공격 유형 분포')
+st.plotly_chart(memo.figure('attack_types', build_fig2), use_container_width=True)
 
-# 상세 테이블
+# 상세 테이블 (프래그먼트, 서버에서 정렬/페이지 나누기, 보이는 페이지만 전송)
+trace.section('table')
 st.subheader("📊 상세 데이터")
-st.dataframe(
-    filtered_df.head(1000),
-    use_container_width=True,
-    column_config={
-        "date": st.column_config.DateColumn("날짜"),
-        "financial_impact": st.column_config.NumberColumn("재정 피해", format="$%.0f"),
-        "affected_users": st.column_config.NumberColumn("피해자 수", format="%.0f")
-    }
-)
+@st.fragment
+@traced('fragment/table', page='cyber_dashboard')
+def data_table(engine, positions, memo):
+    table_col1, table_col2, table_col3, table_col4 = st.columns(4)
+    sort_column = table_col1.selectbox("정렬 기준", [None] + list(engine.columns),
+                                       format_func=lambda c: "(원래 순서)" if c is None else c)
+    ascending = table_col2.radio("정렬 순서", ["오름차순", "내림차순"], horizontal=True) == "오름차순"
+    page_size = table_col3.selectbox("페이지당 행 수", PAGE_SIZES, index=2)
+    n_pages = page_count(len(positions), page_size)
+    page = table_col4.number_input(f"페이지 (전체 {n_pages:,})", min_value=1, max_value=n_pages, value=1)
+    table_order = memo.value(f'table_order_{sort_column}_{ascending}',
+                             lambda: engine.sort_index.sort(positions, sort_column, ascending))
+    page_rows = page_positions(table_order, page, page_size)
+    first_row = (page - 1) * page_size
+    st.caption(f"전체 {len(positions):,}건 중 {min(first_row + 1, len(positions)):,}–{first_row + len(page_rows):,}번째")
+    st.dataframe(
+        tr.frame(engine.rows(page_rows)),
+        use_container_width=True,
+        column_config={
+            "date": st.column_config.DateColumn("날짜"),
+            "financial_impact": st.column_config.NumberColumn("재정 피해", format="$%.0f"),
+            "affected_users": st.column_config.NumberColumn("피해자 수", format="%.0f")
+        }
+    )
+data_table(engine, positions, memo)
 
-# 다운로드 버튼
-csv = filtered_df.to_csv(index=False)
-st.download_button(
-    label="📥 필터링된 데이터 CSV 다운로드",
-    data=csv,
-    file_name="cybersecurity_threats_filtered.csv",
-    mime="text/csv"
-)
+# 다운로드 버튼 (프래그먼트, 클릭할 때만 직렬화, 레이블은 한국어로 변환)
+trace.section('export')
+@st.fragment
+@traced('fragment/export', page='cyber_dashboard')
+def data_export(engine, positions, memo, export_key):
+    # 행은 추정 표본과 클릭 시에만 가져와 레이블을 변환
+    def take(rows):
+        return tr.frame(engine.rows(rows))
+
+    export_format = st.radio("내보내기 형식", list(EXPORT_FORMATS),
+                             format_func=lambda f: EXPORT_FORMATS[f].label, horizontal=True)
+    export_estimate = memo.value(f'export_estimate_ko_{export_format}', lambda: estimate_export(take, positions, export_format))
+    st.caption(f"{export_estimate.rows:,}건 · 약 {format_bytes(export_estimate.bytes)}")
+    too_large = export_too_large(export_estimate)
+    if too_large:
+        st.warning(f"다운로드는 약 {format_bytes(EXPORT_MAX_MB * 2**20)}까지 가능합니다. 필터를 좁혀 주세요.")
+    st.download_button(
+        label=f"📥 필터링된 데이터 {EXPORT_FORMATS[export_format].label} 다운로드",
+        data=lazy_export(take, positions, export_format, key=export_key),
+        file_name=export_file_name("cybersecurity_threats_filtered", export_format),
+        mime=EXPORT_FORMATS[export_format].mime,
+        on_click="ignore",
+        disabled=too_large
+    )
+data_export(engine, positions, memo, ('ko', data_key, selection_key(**filters)))
 
 # 푸터
+trace.section('footer')
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666; padding: 2rem;'>
@@ -142,3 +185,20 @@ st.markdown("""
     <p>사이버보안 위협 분석 및 모니터링을 위한 데이터 시각화</p>
 </div>
 """, unsafe_allow_html=True)
+
+trace.finish()
+
+# 최근 재실행에서 가장 느린 섹션 (운영자 전용)
+if TRACE_PANEL:
+    with st.sidebar.expander("⏱️ 느린 섹션"):
+        last_reruns = st.number_input("최근 재실행 수", min_value=1, max_value=500, value=20)
+        st.dataframe(
+            slowest_sections(last=last_reruns),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "mean_ms": st.column_config.NumberColumn("평균 ms", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 ms", format="%.1f"),
+                "max_ms": st.column_config.NumberColumn("최대 ms", format="%.1f")
+            }
+        )